@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""A deterministic response cache for the OpenAI chat model, which stores
+each non-streaming response in a JSON file keyed by the request. The cache
+is opt-in, enabled by setting `LLM_RESPONSE_CACHE=1`."""
+import hashlib
+import json
+import os
+from typing import Any, AsyncGenerator, Literal, Type
+
+from pydantic import BaseModel
+
+from agentscope import logger
+from agentscope.model import ChatResponse, OpenAIChatModel
+
+
+class CachedOpenAIChatModel(OpenAIChatModel):
+    """The OpenAI chat model that caches the non-streaming responses on disk.
+    The same model, messages, tools and generation arguments always hit the
+    same cache file, so that re-running the fixed prompts in the test
+    scripts doesn't call the API again.
+
+    .. note:: The cache is disabled unless `LLM_RESPONSE_CACHE=1` is set or
+     `cache_enabled=True` is passed, so that connectivity tests reach the
+     API by default. Streaming and structured output requests are never
+     cached.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        cache_dir: str = "./.cache/llm_responses",
+        cache_enabled: bool | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the cached OpenAI chat model.
+
+        Args:
+            cache_dir (`str`, defaults to `"./.cache/llm_responses"`):
+                The directory to store the cached responses.
+            cache_enabled (`bool | None`, defaults to `None`):
+                Whether to cache the responses. If `None`, the cache is
+                enabled only when the `LLM_RESPONSE_CACHE` environment
+                variable is `"1"`.
+            *args (`Any`):
+                The positional arguments of `OpenAIChatModel`.
+            **kwargs (`Any`):
+                The keyword arguments of `OpenAIChatModel`.
+        """
+        super().__init__(*args, **kwargs)
+        self._cache_dir = os.path.abspath(cache_dir)
+        if cache_enabled is None:
+            cache_enabled = os.getenv("LLM_RESPONSE_CACHE") == "1"
+        self.cache_enabled = cache_enabled
+
+    @property
+    def cache_dir(self) -> str:
+        """The cache directory where the response files are stored."""
+        if not os.path.exists(self._cache_dir):
+            os.makedirs(self._cache_dir, exist_ok=True)
+        return self._cache_dir
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        tool_choice: Literal["auto", "none", "any", "required"]
+        | str
+        | None = None,
+        structured_model: Type[BaseModel] | None = None,
+        **kwargs: Any,
+    ) -> ChatResponse | AsyncGenerator[ChatResponse, None]:
+        """Return the cached response if the same request has been sent
+        before, otherwise call the OpenAI API and cache the response."""
+        if not self.cache_enabled or self.stream or structured_model:
+            return await super().__call__(
+                messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                structured_model=structured_model,
+                **kwargs,
+            )
+
+        path_file = os.path.join(
+            self.cache_dir,
+            self._get_filename(
+                {
+                    "model": self.model_name,
+                    "messages": messages,
+                    "tools": tools,
+                    "tool_choice": tool_choice,
+                    "generate_kwargs": {**self.generate_kwargs, **kwargs},
+                },
+            ),
+        )
+
+        if os.path.isfile(path_file):
+            with open(path_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            logger.info("Load the cached response from %s.", path_file)
+            return ChatResponse(
+                content=cached["content"],
+                metadata=cached["metadata"],
+            )
+
+        response = await super().__call__(
+            messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            **kwargs,
+        )
+
+        with open(path_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "content": list(response.content),
+                    "metadata": response.metadata,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        return response
+
+    @staticmethod
+    def _get_filename(identifier: dict) -> str:
+        """Generate a filename based on the request."""
+        json_str = json.dumps(identifier, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(json_str.encode("utf-8")).hexdigest() + ".json"
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 """The main entry point of the browser agent example."""
-import asyncio
 import os
 
 from agentscope.formatter import DashScopeChatFormatter
@@ -11,6 +10,7 @@ from agentscope.mcp import StdIOStatefulClient
 from agentscope.agent import UserAgent
 
 from browser_agent import BrowserAgent  # pylint: disable=C0411
+from utils import run  # pylint: disable=C0411
 
 
 async def main() -> None:
@@ -78,4 +78,4 @@ if __name__ == "__main__":
         "by `npx @playwright/mcp@latest`",
     )
 
-    asyncio.run(main())
+    run(main())
@@ -15,31 +15,39 @@ except ImportError:
     print("python-dotenv not installed. Please install it with: pip install python-dotenv")
     print("Or set environment variables manually.")
 
-from agentscope.formatter import OpenAIChatFormatter
+from agentscope.formatter import IncrementalOpenAIChatFormatter
 from agentscope.memory import InMemoryMemory
 from agentscope.model import OpenAIChatModel
 from agentscope.tool import Toolkit
-from agentscope.mcp import StdIOStatefulClient
+from agentscope.mcp import HttpStatefulClient, StdIOStatefulClient
 from agentscope.agent import UserAgent
 
 from browser_agent import BrowserAgent  # pylint: disable=C0411
+from utils import run  # pylint: disable=C0411
 
 
 async def main() -> None:
     """The main entry point for the browser agent example."""
     # Setup toolkit with browser tools from MCP server
     toolkit = Toolkit()
-    browser_client = StdIOStatefulClient(
-        name="playwright-mcp",
-        command="npx",
-        args=["@playwright/mcp@latest"],
-    )
+    # Connect to a long-running Playwright MCP server if its URL is given,
+    # so that npx and node don't cold start on every run; otherwise spawn
+    # the server as a subprocess
+    playwright_mcp_url = os.environ.get("PLAYWRIGHT_MCP_URL")
+    if playwright_mcp_url:
+        browser_client = HttpStatefulClient(
+            name="playwright-mcp",
+            transport="streamable_http",
+            url=playwright_mcp_url,
+        )
+    else:
+        browser_client = StdIOStatefulClient(
+            name="playwright-mcp",
+            command="npx",
+            args=["@playwright/mcp@latest"],
+        )
 
     try:
-        # Connect to the browser client
-        await browser_client.connect()
-        await toolkit.register_mcp_client(browser_client)
-
         # Get custom OpenAI API configuration
         api_key = os.environ.get("CUSTOM_OPENAI_API_KEY")
         base_url = os.environ.get("CUSTOM_OPENAI_BASE_URL")
@@ -49,16 +57,26 @@ async def main() -> None:
             raise ValueError("CUSTOM_OPENAI_API_KEY environment variable is required")
         if base_url is None:
             raise ValueError("CUSTOM_OPENAI_BASE_URL environment variable is required")
-        # Create browser agent
-        agent = BrowserAgent(
-            name="BrowserBot",
-            model=OpenAIChatModel(
+
+        # Connect to the browser client, and build the model client (which
+        # loads the SSL context) in a thread while the MCP server starts
+        model, _ = await asyncio.gather(
+            asyncio.to_thread(
+                OpenAIChatModel,
                 model_name=model_name,
                 api_key=api_key,
                 client_args={"base_url": base_url},
                 stream=True,
             ),
-            formatter=OpenAIChatFormatter(),
+            browser_client.connect(),
+        )
+        await toolkit.register_mcp_client(browser_client)
+
+        # Create browser agent
+        agent = BrowserAgent(
+            name="BrowserBot",
+            model=model,
+            formatter=IncrementalOpenAIChatFormatter(),
             memory=InMemoryMemory(),
             toolkit=toolkit,
             max_iters=50,
@@ -95,4 +113,4 @@ if __name__ == "__main__":
         "by `npx @playwright/mcp@latest`",
     )
 
-    asyncio.run(main())
+    run(main())
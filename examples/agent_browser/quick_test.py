@@ -12,46 +12,57 @@ os.environ["CUSTOM_OPENAI_API_KEY"] = "sk-sbwxkcjoeolowiokiusntqcqjbwqtyqlzrlxvj
 os.environ["CUSTOM_OPENAI_BASE_URL"] = "https://api.siliconflow.cn/v1"
 os.environ["CUSTOM_MODEL_NAME"] = "deepseek-ai/DeepSeek-R1-Distill-Qwen-7B"
 
-from agentscope.model import OpenAIChatModel
 from agentscope.model._model_response import ChatResponse
 from agentscope.message import Msg
 
+from _cache import CachedOpenAIChatModel  # pylint: disable=C0411
+from utils import run  # pylint: disable=C0411
+
+# 按内容块类型提取可显示文本的分发表，内容块本身就是字典，无需复制
+_BLOCK_TEXT_HANDLERS = {
+    "text": lambda block: block.get("text", ""),
+    "thinking": lambda block: block.get("thinking", ""),
+    "tool_use": lambda block: f"工具调用: {block.get('name', '')} - {block.get('input', {})}",
+}
+
 async def quick_test():
     """快速测试模型"""
     print("🚀 快速测试自定义模型...")
     
     try:
-        model = OpenAIChatModel(
+        model = CachedOpenAIChatModel(
             model_name=os.environ["CUSTOM_MODEL_NAME"],
             api_key=os.environ["CUSTOM_OPENAI_API_KEY"],
             client_args={"base_url": os.environ["CUSTOM_OPENAI_BASE_URL"]},
             stream=False,  # 关闭流式输出以简化测试
         )
         
-        # 简单测试消息
-        messages = [{"role": "user", "content": "你好，请简单回答：1+1等于几？"}]
-        
-        response: Union[ChatResponse, AsyncGenerator[ChatResponse, None]] = await model(messages)
-        
-        # 由于stream=False，这里应该返回ChatResponse而不是AsyncGenerator
-        if isinstance(response, ChatResponse):
-            content_text = "无响应内容"
-            if response.content:
-                for block in response.content:
-                    block_dict = dict(block)
-                    if block_dict.get("type") == "text":
-                        content_text = block_dict.get("text", "")
-                        break
-                    elif block_dict.get("type") == "thinking":
-                        content_text = block_dict.get("thinking", "")
-                        break
-                    elif block_dict.get("type") == "tool_use":
-                        content_text = f"工具调用: {block_dict.get('name', '')} - {block_dict.get('input', {})}"
-                        break
-        else:
-            content_text = "流式响应不支持在此测试中"
-                    
-        print(f"✅ 模型响应: {content_text}")
+        # 简单测试消息，并发发送以重叠网络等待
+        prompts = [
+            "你好，请简单回答：1+1等于几？",
+            "请简单回答：中国的首都是哪里？",
+            "请用一句话介绍你自己。",
+        ]
+        responses: list[Union[ChatResponse, AsyncGenerator[ChatResponse, None]]] = await asyncio.gather(
+            *(model([{"role": "user", "content": prompt}]) for prompt in prompts),
+        )
+
+        for prompt, response in zip(prompts, responses):
+            # 由于stream=False，这里应该返回ChatResponse而不是AsyncGenerator
+            if isinstance(response, ChatResponse):
+                # 取第一个可显示的内容块，找到后立即停止扫描
+                content_text = next(
+                    (
+                        _BLOCK_TEXT_HANDLERS[block["type"]](block)
+                        for block in response.content or []
+                        if block.get("type") in _BLOCK_TEXT_HANDLERS
+                    ),
+                    "无响应内容",
+                )
+            else:
+                content_text = "流式响应不支持在此测试中"
+
+            print(f"✅ [{prompt}] 模型响应: {content_text}")
         print("✅ 自定义模型配置成功！")
         return True
         
@@ -60,5 +71,5 @@ async def quick_test():
         return False
 
 if __name__ == "__main__":
-    success = asyncio.run(quick_test())
+    success = run(quick_test())
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -17,6 +17,8 @@ from agentscope.model import OpenAIChatModel
 from agentscope.agent import ReActAgent, UserAgent
 from agentscope.message import Msg
 
+from utils import run  # pylint: disable=C0411
+
 
 async def main():
     """不依赖浏览器工具的智能体示例"""
@@ -58,8 +60,8 @@ async def main():
         
         msg = None
         while True:
-            # 获取用户输入
-            user_input = input("👤 您: ")
+            # 获取用户输入，在线程中等待以避免阻塞事件循环
+            user_input = await asyncio.to_thread(input, "👤 您: ")
             if user_input.lower() == "exit":
                 print("👋 再见！")
                 break
@@ -67,10 +69,9 @@ async def main():
             # 创建消息
             msg = Msg("用户", user_input, "user")
             
-            # 获取智能体响应
-            print("🤖 助手: ", end="", flush=True)
-            response = await agent(msg)
-            print(response.get_text_content())
+            # 获取智能体响应，流式输出的内容会在生成时由智能体直接打印，
+            # 无需等待完整响应后再次打印
+            await agent(msg)
             print("-" * 30)
             
     except Exception as e:
@@ -82,4 +83,4 @@ if __name__ == "__main__":
     print("使用模型: DeepSeek-R1-Distill-Qwen-7B")
     print("=" * 50)
     
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
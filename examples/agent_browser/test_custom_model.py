@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 """测试自定义 OpenAI 兼容模型的简单脚本"""
 
-import asyncio
 import os
 from pathlib import Path
 
@@ -23,6 +22,8 @@ from agentscope.model import OpenAIChatModel
 from agentscope.agent import ReActAgent
 from agentscope.message import Msg
 
+from utils import run  # pylint: disable=C0411
+
 
 async def test_custom_model():
     """测试自定义 OpenAI 兼容模型"""
@@ -88,7 +89,7 @@ async def test_custom_model():
 
 
 if __name__ == "__main__":
-    success = asyncio.run(test_custom_model())
+    success = run(test_custom_model())
     if success:
         print("\n🎉 现在可以继续设置 Node.js 来使用浏览器功能了！")
     else:
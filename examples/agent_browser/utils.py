@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""The utilities for the browser agent examples."""
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """Run the coroutine on the faster uvloop event loop when it's
+    installed (uvloop>=0.18 provides `uvloop.run`), and fall back to the
+    default asyncio event loop otherwise."""
+    try:
+        import uvloop
+
+        runner = uvloop.run
+    except (ImportError, AttributeError):
+        runner = asyncio.run
+    return runner(main)
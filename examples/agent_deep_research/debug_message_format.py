@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """诊断消息格式问题的脚本"""
+from __future__ import annotations
 
-import asyncio
 import os
+import sys
 from pathlib import Path
 
 # 加载环境变量
@@ -15,12 +16,12 @@ except ImportError:
     print("python-dotenv not installed. Please install it with: pip install python-dotenv")
 
 from deep_research_agent import DeepResearchAgent
+from utils import run
 from agentscope.formatter import OpenAIChatFormatter
 from agentscope.memory import InMemoryMemory
 from agentscope.model import OpenAIChatModel
 from agentscope.message import Msg
 from agentscope.mcp import StdIOStatefulClient
-import json
 
 
 async def debug_message_format():
@@ -87,8 +88,14 @@ async def debug_message_format():
         ]
         
         print(f"消息总数: {len(msgs)}")
-        for i, msg in enumerate(msgs):
-            print(f"消息 {i+1}: role={msg.role}, name={msg.name}, content_type={type(msg.content)}")
+        # 一次性拼接后写出，避免每条消息都触发一次输出
+        sys.stdout.write(
+            "".join(
+                f"消息 {i+1}: role={msg.role}, name={msg.name}, "
+                f"content_type={type(msg.content)}\n"
+                for i, msg in enumerate(msgs)
+            ),
+        )
         
         # 使用格式化器格式化消息
         formatted_msgs = await agent.formatter.format(msgs)
@@ -96,13 +103,15 @@ async def debug_message_format():
         print(f"\n📤 格式化后的消息结构:")
         print(f"消息数量: {len(formatted_msgs)}")
         
+        lines = []
         for i, msg in enumerate(formatted_msgs):
-            print(f"\n消息 {i+1}:")
-            print(f"  role: {msg.get('role')}")
-            print(f"  name: {msg.get('name', 'N/A')}")
-            print(f"  content: {type(msg.get('content'))}")
+            lines.append(f"\n消息 {i+1}:")
+            lines.append(f"  role: {msg.get('role')}")
+            lines.append(f"  name: {msg.get('name', 'N/A')}")
+            lines.append(f"  content: {type(msg.get('content'))}")
             if isinstance(msg.get('content'), list) and len(msg['content']) > 0:
-                print(f"  content[0]: {msg['content'][0]}")
+                lines.append(f"  content[0]: {msg['content'][0]}")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         # 保存详细信息到文件
         debug_info = {
@@ -110,8 +119,26 @@ async def debug_message_format():
             "formatted_messages": formatted_msgs
         }
         
-        with open("debug_message_format.json", "w", encoding="utf-8") as f:
-            json.dump(debug_info, f, ensure_ascii=False, indent=2)
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+
+        if orjson is not None:
+            # orjson 直接输出 UTF-8 字节，避免中间字符串拷贝
+            with open("debug_message_format.json", "wb") as f:
+                f.write(
+                    orjson.dumps(
+                        debug_info,
+                        default=str,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                    ),
+                )
+        else:
+            import json
+
+            with open("debug_message_format.json", "w", encoding="utf-8") as f:
+                json.dump(debug_info, f, ensure_ascii=False, indent=2, default=str)
         
         print(f"\n💾 详细信息已保存到 debug_message_format.json")
         
@@ -122,4 +149,4 @@ async def debug_message_format():
 
 
 if __name__ == "__main__":
-    asyncio.run(debug_message_format())
\ No newline at end of file
+    run(debug_message_format())
\ No newline at end of file
@@ -2,9 +2,11 @@
 """Deep Research Agent"""
 # pylint: disable=too-many-lines, no-name-in-module
 import os
+import re
 import json
 import asyncio
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Type, Optional, Any, Tuple
 from datetime import datetime
 from copy import deepcopy
@@ -53,6 +55,10 @@ _LOG_PATH = os.path.join(
 os.makedirs(_LOG_DIR, exist_ok=True)
 setup_logger(level="INFO", filepath=_LOG_PATH)
 
+# A small persistent pool for the CPU-bound post-processing of tool results,
+# so that the event loop keeps serving the model stream and MCP clients
+_CPU_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="research")
+
 
 class SubTaskItem(BaseModel):
     """Subtask item of deep research agent."""
@@ -99,6 +105,8 @@ class DeepResearchAgent(ReActAgent):
         max_iters: int = 30,
         max_depth: int = 3,
         tmp_file_storage_dir: str = "tmp",
+        convergence_threshold: float = 0.1,
+        reasoning_max_tokens: int | None = None,
     ) -> None:
         """Initialize the Deep Research Agent.
 
@@ -128,6 +136,18 @@ class DeepResearchAgent(ReActAgent):
             tmp_file_storage_dir (str, optional):
                 The storage dir for generated files.
                 Default to 'tmp'
+            convergence_threshold (float, optional):
+                The minimum ratio of new URLs in the search results of a
+                reasoning round. If two consecutive rounds with searches fall
+                below it, the search is considered converged and the agent
+                stops iterating and summarizes its findings. Defaults to 0.1.
+            reasoning_max_tokens (int | None, optional):
+                The output token limit applied to the reasoning steps only,
+                which are mostly short tool calls. It overrides the
+                `max_tokens` in the model's generation arguments during
+                reasoning, while the intermediate and final reports keep
+                the model's own limit. Defaults to None, i.e. the model's own
+                generation arguments are used everywhere.
         Returns:
             None
         """
@@ -160,8 +180,13 @@ class DeepResearchAgent(ReActAgent):
         # register all necessary tools for deep research agent
         self.toolkit.register_tool_function(view_text_file)
         self.toolkit.register_tool_function(write_text_file)
-        asyncio.get_running_loop().create_task(
-            self.toolkit.register_mcp_client(search_mcp_client),
+        # Set once the search tools are registered (or the registration
+        # fails), so that callers can wait for it instead of sleeping. The
+        # task is kept on the agent, since the event loop only holds weak
+        # references to tasks and may otherwise collect it before it's done
+        self.tools_ready = asyncio.Event()
+        self._register_task = asyncio.get_running_loop().create_task(
+            self._register_search_tools(search_mcp_client),
         )
 
         self.search_function = "tavily-search"
@@ -178,18 +203,46 @@ class DeepResearchAgent(ReActAgent):
         self._required_structured_model = None
         self.user_query = None
 
+        # Track the novelty of the search results for early exit
+        self.convergence_threshold = convergence_threshold
+        self._seen_urls: set[str] = set()
+        self._round_search_urls: set[str] | None = None
+        self._stale_search_rounds = 0
+
+        self.reasoning_max_tokens = reasoning_max_tokens
+
         # add functions into toolkit
         self.toolkit.register_tool_function(self.reflect_failure)
         self.toolkit.register_tool_function(
             self.summarize_intermediate_results,
         )
 
+    async def _register_search_tools(
+        self,
+        search_mcp_client: StatefulClientBase,
+    ) -> None:
+        """Register the tools of the search MCP client, and mark the tools
+        as ready when it's done."""
+        try:
+            await self.toolkit.register_mcp_client(search_mcp_client)
+        except Exception as e:
+            logger.warning("Failed to register the search tools: %s", e)
+        finally:
+            self.tools_ready.set()
+
     async def reply(
         self,
         msg: Msg | list[Msg] | None = None,
         structured_model: Type[BaseModel] | None = None,
     ) -> Msg:
         """The reply method of the agent."""
+        # Make sure the search tools are available in the first reasoning
+        await self.tools_ready.wait()
+
+        self._seen_urls.clear()
+        self._round_search_urls = None
+        self._stale_search_rounds = 0
+
         # Maintain the subtask list
         self.user_query = msg.get_text_content()
         self.current_subtask.append(
@@ -266,9 +319,38 @@ class DeepResearchAgent(ReActAgent):
                     self.current_subtask = []
                     return msg_response
 
-        # When the maximum iterations are reached, summarize all the findings
+            self._update_search_novelty()
+
+            # Stop early when the searches keep returning known sources
+            if self._stale_search_rounds >= 2:
+                logger.info(
+                    "The search results have converged, summarize the "
+                    "findings now.",
+                )
+                break
+
+        # When the maximum iterations are reached or the search has converged,
+        # summarize all the findings
         return await self._summarizing()
 
+    async def _reasoning(self) -> Msg:
+        """Perform the reasoning step, with the output capped at
+        `reasoning_max_tokens` if it is set."""
+        if self.reasoning_max_tokens is None:
+            return await super()._reasoning()
+
+        # Only this call sees the cap; the report generation in the tool
+        # functions runs afterwards with the original arguments.
+        generate_kwargs = self.model.generate_kwargs
+        self.model.generate_kwargs = {
+            **generate_kwargs,
+            "max_tokens": self.reasoning_max_tokens,
+        }
+        try:
+            return await super()._reasoning()
+        finally:
+            self.model.generate_kwargs = generate_kwargs
+
     async def _acting(self, tool_call: ToolUseBlock) -> Msg | None:
         """
         Execute a tool call and process its response with browser-specific
@@ -352,7 +434,11 @@ class DeepResearchAgent(ReActAgent):
                     self.search_function,
                     self.extract_function,
                 ]:
-                    tool_res_msg.content[0]["output"] = truncate_search_result(
+                    tool_res_msg.content[0][
+                        "output"
+                    ] = await asyncio.get_running_loop().run_in_executor(
+                        _CPU_POOL,
+                        truncate_search_result,
                         tool_res_msg.content[0]["output"],
                     )
 
@@ -374,6 +460,7 @@ class DeepResearchAgent(ReActAgent):
 
             # Read more information from the web page if necessary
             if tool_call["name"] == self.search_function:
+                self._collect_search_urls(chunk.content)
                 extract_res = await self._follow_up(chunk.content, tool_call)
                 # 检查 extract_res.metadata 是否为字典类型且不为 None
                 if extract_res.metadata is not None and isinstance(
@@ -412,6 +499,34 @@ class DeepResearchAgent(ReActAgent):
                     ),
                 )
 
+    def _collect_search_urls(self, search_results: list) -> None:
+        """Collect the URLs in the search results of the current reasoning
+        round."""
+        if self._round_search_urls is None:
+            self._round_search_urls = set()
+        for block in search_results or []:
+            text = block.get("text", "") if isinstance(block, dict) else ""
+            self._round_search_urls.update(
+                re.findall(r"https?://[^\s\"'<>()\[\]]+", text),
+            )
+
+    def _update_search_novelty(self) -> None:
+        """Count the consecutive reasoning rounds whose searches return a
+        ratio of unseen URLs below the convergence threshold. Rounds without
+        any search don't change the count."""
+        urls = self._round_search_urls
+        if urls is None:
+            return
+        self._round_search_urls = None
+
+        new_urls = urls - self._seen_urls
+        self._seen_urls.update(urls)
+
+        if len(new_urls) / max(1, len(urls)) < self.convergence_threshold:
+            self._stale_search_rounds += 1
+        else:
+            self._stale_search_rounds = 0
+
     async def get_model_output(
         self,
         msgs: list,
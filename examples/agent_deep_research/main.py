@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 """The main entry point of the Deep Research agent example."""
 # 深度研究智能体示例的主入口点
+from __future__ import annotations  # 延迟类型注解的求值
 
 import asyncio  # 导入异步IO库
+import functools  # 导入函数缓存工具
 import os  # 导入操作系统接口模块
+from dataclasses import dataclass  # 导入数据类装饰器
 from pathlib import Path  # 导入路径处理模块
 
 # Load environment variables from .env file
@@ -31,6 +34,7 @@ except ImportError:
     print("Or set environment variables manually.")  # 提示手动设置环境变量
 
 from deep_research_agent import DeepResearchAgent  # 导入深度研究智能体
+from utils import enable_queue_logging, find_npx, run  # 导入日志队列、npx 查找和事件循环工具
 
 from agentscope import logger  # 导入日志记录器
 from agentscope.formatter import OpenAIChatFormatter  # 导入OpenAI聊天格式化器
@@ -40,6 +44,39 @@ from agentscope.message import Msg  # 导入消息类
 from agentscope.mcp import StdIOStatefulClient  # 导入标准输入输出有状态客户端
 
 
+@dataclass(frozen=True)
+class _Config:
+    """The configuration of the example loaded from environment variables."""
+
+    tavily_api_key: str | None
+    api_key: str | None
+    base_url: str | None
+    model_name: str
+    agent_working_dir: str
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> _Config:
+    """Load the configuration from environment variables once per process."""
+    default_working_dir = os.path.join(  # 构建默认工作目录路径
+        os.path.dirname(__file__),  # 获取当前文件目录
+        "deepresearch_agent_demo_env",  # 添加子目录名
+    )
+    return _Config(
+        tavily_api_key=os.environ.get("TAVILY_API_KEY"),
+        api_key=os.environ.get("CUSTOM_OPENAI_API_KEY"),  # 获取API密钥
+        base_url=os.environ.get("CUSTOM_OPENAI_BASE_URL"),  # 获取基础URL
+        model_name=os.environ.get(  # 获取模型名称，默认为gpt-3.5-turbo
+            "CUSTOM_MODEL_NAME",
+            "gpt-3.5-turbo",
+        ),
+        agent_working_dir=os.getenv(  # 获取智能体工作目录
+            "AGENT_OPERATION_DIR",
+            default_working_dir,
+        ),
+    )
+
+
 async def main(user_query: str) -> None:  # 定义主异步函数，接收用户查询参数
     """The main entry point for the Deep Research agent example."""
     # 深度研究智能体示例的主入口点
@@ -47,27 +84,27 @@ async def main(user_query: str) -> None:  # 定义主异步函数，接收用户
 
     # 检查环境变量和依赖
     # 首先检查环境变量是否被正确加载
-    print("🔍 检查环境变量加载情况:")
-    tavily_api_key: str | None = os.environ.get("TAVILY_API_KEY")
-    print(f"   TAVILY_API_KEY: {'已设置' if tavily_api_key else '未设置'}")
+    config = _load_config()
+    tavily_api_key = config.tavily_api_key
     if tavily_api_key:
-        print(f"   API密钥长度: {len(tavily_api_key)} 字符")
-        print(f"   API密钥前缀: {tavily_api_key[:10]}...")
-
-    if not tavily_api_key:
-        print("⚠️ 警告: 未设置 TAVILY_API_KEY，搜索功能可能受限")
+        logger.debug(
+            "TAVILY_API_KEY 已设置，长度: %d 字符，前缀: %s...",
+            len(tavily_api_key),
+            tavily_api_key[:10],
+        )
+    else:
+        logger.warning("未设置 TAVILY_API_KEY，搜索功能可能受限")
 
     # 检查 npx 是否可用
-    import shutil
-
-    npx_path = shutil.which("npx")
+    npx_path = find_npx()
     if not npx_path:
-        print("❌ 错误: 未找到 npx 命令")
-        print("💡 建议: 使用 main_no_search.py 运行不需要搜索工具的版本")
-        print("或者确保 Node.js 已正确安装并在 PATH 中")
+        logger.error(
+            "未找到 npx 命令，请确保 Node.js 已正确安装并在 PATH 中，"
+            "或使用 main_no_search.py 运行不需要搜索工具的版本",
+        )
         return
 
-    print(f"✅ 找到 npx: {npx_path}")
+    logger.debug("找到 npx: %s", npx_path)
 
     tavily_search_client: StdIOStatefulClient = (
         StdIOStatefulClient(  # 创建Tavily搜索客户端
@@ -78,24 +115,14 @@ async def main(user_query: str) -> None:  # 定义主异步函数，接收用户
         )
     )
 
-    default_working_dir = os.path.join(  # 构建默认工作目录路径
-        os.path.dirname(__file__),  # 获取当前文件目录
-        "deepresearch_agent_demo_env",  # 添加子目录名
-    )
-    agent_working_dir = os.getenv(  # 获取智能体工作目录
-        "AGENT_OPERATION_DIR",  # 环境变量名
-        default_working_dir,  # 默认值
-    )
-    os.makedirs(agent_working_dir, exist_ok=True)  # 创建工作目录，如果已存在则忽略
+    agent_working_dir = config.agent_working_dir  # 获取智能体工作目录
 
     try:
         # Get custom OpenAI API configuration
         # 获取自定义OpenAI API配置
-        api_key = os.environ.get("CUSTOM_OPENAI_API_KEY")  # 获取API密钥
-        base_url = os.environ.get("CUSTOM_OPENAI_BASE_URL")  # 获取基础URL
-        model_name = os.environ.get(
-            "CUSTOM_MODEL_NAME", "gpt-3.5-turbo"
-        )  # 获取模型名称，默认为gpt-3.5-turbo
+        api_key = config.api_key  # 获取API密钥
+        base_url = config.base_url  # 获取基础URL
+        model_name = config.model_name  # 获取模型名称
 
         if api_key is None:  # 检查API密钥是否存在
             raise ValueError(
@@ -106,15 +133,11 @@ async def main(user_query: str) -> None:  # 定义主异步函数，接收用户
                 "CUSTOM_OPENAI_BASE_URL environment variable is required"
             )  # 抛出错误：需要基础URL环境变量
 
-        # 连接到Tavily搜索客户端
-        print("🔗 正在连接到Tavily搜索客户端...")
-        await tavily_search_client.connect()  # 连接到Tavily搜索客户端
-        print("✅ Tavily搜索客户端连接成功")
-
-        agent = DeepResearchAgent(  # 创建深度研究智能体实例
-            name="Friday",  # 设置智能体名称
-            sys_prompt="You are Friday, a helpful research assistant.",  # 简化系统提示
-            model=OpenAIChatModel(  # 配置OpenAI聊天模型
+        # 连接到Tavily搜索客户端，同时在线程中创建工作目录和模型客户端
+        logger.info("正在连接到Tavily搜索客户端...")
+        model, _, _ = await asyncio.gather(
+            asyncio.to_thread(  # 配置OpenAI聊天模型
+                OpenAIChatModel,
                 model_name=model_name,  # 设置模型名称
                 api_key=api_key,  # 设置API密钥
                 client_args={"base_url": base_url},  # 设置客户端参数
@@ -124,6 +147,19 @@ async def main(user_query: str) -> None:  # 定义主异步函数，接收用户
                     "max_tokens": 2048,  # 减少最大令牌数以提高兼容性
                 },
             ),
+            asyncio.to_thread(  # 创建工作目录，如果已存在则忽略
+                os.makedirs,
+                agent_working_dir,
+                exist_ok=True,
+            ),
+            tavily_search_client.connect(),  # 连接到Tavily搜索客户端
+        )
+        logger.info("Tavily搜索客户端连接成功")
+
+        agent = DeepResearchAgent(  # 创建深度研究智能体实例
+            name="Friday",  # 设置智能体名称
+            sys_prompt="You are Friday, a helpful research assistant.",  # 简化系统提示
+            model=model,  # 设置聊天模型
             formatter=OpenAIChatFormatter(),  # 设置聊天格式化器
             memory=InMemoryMemory(),  # 设置内存存储
             search_mcp_client=tavily_search_client,  # 设置搜索MCP客户端
@@ -136,9 +172,9 @@ async def main(user_query: str) -> None:  # 定义主异步函数，接收用户
             content=user_query,  # 设置消息内容
             role="user",  # 设置角色为用户
         )
-        print("🤖 智能体已初始化，开始处理查询...")
+        logger.info("智能体已初始化，开始处理查询...")
         result = await agent(msg)  # 调用智能体处理消息
-        print("✅ 查询处理完成")
+        logger.info("查询处理完成")
         print("📋 研究结果:")
         print("=" * 60)
         print(result.get_text_content())
@@ -146,18 +182,14 @@ async def main(user_query: str) -> None:  # 定义主异步函数，接收用户
         logger.info(result)  # 记录结果信息
 
     except Exception as err:  # 捕获异常
-        print(f"❌ 执行过程中发生错误: {err}")
-        import traceback
-        traceback.print_exc()
-        logger.exception(err)  # 记录异常信息
+        logger.exception(err)  # 记录异常信息及调用栈
     finally:
         try:
-            print("🔌 正在关闭Tavily搜索客户端...")
+            logger.info("正在关闭Tavily搜索客户端...")
             await tavily_search_client.close()  # 关闭Tavily搜索客户端连接
-            print("✅ Tavily搜索客户端已关闭")
+            logger.info("Tavily搜索客户端已关闭")
         except Exception as e:
-            print(f"⚠️ 关闭Tavily搜索客户端时发生错误: {e}")
-            logger.warning(f"关闭Tavily搜索客户端时发生错误: {e}")
+            logger.warning("关闭Tavily搜索客户端时发生错误: %s", e)
 
 
 if __name__ == "__main__":  # 判断是否为主程序入口
@@ -169,8 +201,9 @@ if __name__ == "__main__":  # 判断是否为主程序入口
         "到最接近的1000小时，如有必要请不要使用"
         "任何逗号分隔符。"
     )
+    # 由后台线程写出日志，避免在事件循环中阻塞
+    enable_queue_logging()
     try:
-        asyncio.run(main(query))  # 运行主异步函数
+        run(main(query))  # 运行主异步函数
     except Exception as e:  # 捕获异常
-        print(f"❌ 程序执行过程中发生错误: {e}")
         logger.exception(e)  # 记录异常信息
\ No newline at end of file
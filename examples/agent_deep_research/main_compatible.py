@@ -3,7 +3,9 @@
 
 import asyncio
 import os
+import sys
 from pathlib import Path
+from typing import Final
 
 # 加载环境变量
 try:
@@ -22,14 +24,14 @@ from agentscope.agent import ReActAgent
 from agentscope.tool import Toolkit
 from agentscope.mcp import StdIOStatefulClient
 
+from utils import enable_queue_logging, run  # pylint: disable=C0411
 
-class CompatibleDeepResearchAgent(ReActAgent):
-    """兼容SiliconFlow API的简化深度研究智能体"""
-    
-    def __init__(self, *args, search_mcp_client=None, **kwargs):
-        """初始化兼容的智能体"""
-        # 使用更简单但准确的系统提示符
-        simple_sys_prompt = """You are Friday, a helpful research assistant. Your capabilities include:
+# 格式化器无状态，所有智能体共享同一个实例；记忆和工具包则每个智能体独立创建
+_FORMATTER = OpenAIChatFormatter()
+
+# 更简单但准确的系统提示符，在模块加载时驻留一次，所有智能体实例共享同一个字符串对象
+_SIMPLE_SYS_PROMPT: Final[str] = sys.intern(
+    """You are Friday, a helpful research assistant. Your capabilities include:
 
 1. Conducting thorough research using search tools
 2. Analyzing and synthesizing information from multiple sources  
@@ -42,33 +44,47 @@ When conducting research:
 - Present information clearly and logically
 - Be precise about dates, names, and facts
 
-Always strive for accuracy and completeness in your research."""
-        
+Always strive for accuracy and completeness in your research.""",
+)
+
+
+class CompatibleDeepResearchAgent(ReActAgent):
+    """兼容SiliconFlow API的简化深度研究智能体"""
+    
+    def __init__(self, *args, **kwargs):
+        """初始化兼容的智能体，搜索工具需要通过 `create` 注册"""
         # 替换复杂的系统提示符
         if 'sys_prompt' in kwargs:
-            kwargs['sys_prompt'] = simple_sys_prompt
+            kwargs['sys_prompt'] = _SIMPLE_SYS_PROMPT
         
         super().__init__(*args, **kwargs)
-        
-        # 注册搜索工具
+
+    @classmethod
+    async def create(
+        cls,
+        *args,
+        search_mcp_client=None,
+        **kwargs,
+    ) -> "CompatibleDeepResearchAgent":
+        """创建智能体，并在返回前完成搜索工具的注册，避免第一轮推理时工具尚未就绪"""
+        agent = cls(*args, **kwargs)
         if search_mcp_client:
-            asyncio.create_task(self._register_search_tools(search_mcp_client))
-    
+            await agent._register_search_tools(search_mcp_client)
+        return agent
+
     async def _register_search_tools(self, search_client):
         """注册搜索工具"""
         try:
             await search_client.connect()
             await self.toolkit.register_mcp_client(search_client)
-            print("✅ 搜索工具注册成功")
+            logger.info("搜索工具注册成功")
         except Exception as e:
-            print(f"⚠️ 搜索工具注册失败: {e}")
+            logger.warning("搜索工具注册失败: %s", e)
 
 
 async def main_compatible(user_query: str) -> None:
     """兼容版本的主函数"""
-    print(f"🚀 开始执行兼容版本的深度研究...")
-    print(f"📝 查询: {user_query}")
-    print("=" * 60)
+    logger.info("开始执行兼容版本的深度研究，查询: %s", user_query)
 
     # 创建搜索客户端
     tavily_search_client = StdIOStatefulClient(
@@ -87,13 +103,13 @@ async def main_compatible(user_query: str) -> None:
         raise ValueError("需要设置 CUSTOM_OPENAI_API_KEY 和 CUSTOM_OPENAI_BASE_URL")
 
     try:
-        print("🤖 创建兼容的研究智能体...")
+        logger.info("创建兼容的研究智能体...")
         
         # 创建工具包
         toolkit = Toolkit()
         
         # 创建兼容的智能体
-        agent = CompatibleDeepResearchAgent(
+        agent = await CompatibleDeepResearchAgent.create(
             name="Friday",
             sys_prompt="You are Friday, a helpful research assistant.",  # 简化的提示符
             model=OpenAIChatModel(
@@ -106,14 +122,13 @@ async def main_compatible(user_query: str) -> None:
                     "max_tokens": 2048,  # 减少最大令牌数
                 },
             ),
-            formatter=OpenAIChatFormatter(),
+            formatter=_FORMATTER,
             memory=InMemoryMemory(),
             toolkit=toolkit,
             search_mcp_client=tavily_search_client,
         )
         
-        print("✅ 智能体创建成功")
-        print("🔍 开始研究...")
+        logger.info("智能体创建成功，开始研究...")
         
         # 创建用户消息
         msg = Msg("user", user_query, "user")
@@ -128,56 +143,68 @@ async def main_compatible(user_query: str) -> None:
         print("=" * 60)
 
     except Exception as err:
-        print(f"❌ 执行错误: {err}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("执行错误: %s", err)
     finally:
         try:
             await tavily_search_client.close()
-            print("✅ 清理完成")
+            logger.info("清理完成")
         except:
             pass
 
 
 async def test_simple_query():
     """测试简单查询"""
-    print("🧪 测试简单查询（不需要搜索）...")
+    logger.info("测试简单查询（不需要搜索）...")
     
     api_key = os.environ.get("CUSTOM_OPENAI_API_KEY")
     base_url = os.environ.get("CUSTOM_OPENAI_BASE_URL")
     model_name = os.environ.get("CUSTOM_MODEL_NAME", "gpt-3.5-turbo")
 
     if not api_key or not base_url:
-        print("❌ 环境变量未设置")
+        logger.error("环境变量未设置")
         return
 
-    try:
-        # 创建简单的智能体（无搜索工具）
-        agent = ReActAgent(
+    # 模型无状态，所有智能体共享同一个模型客户端
+    model = OpenAIChatModel(
+        model_name=model_name,
+        api_key=api_key,
+        client_args={"base_url": base_url},
+        stream=False,
+    )
+
+    def create_simple_agent() -> ReActAgent:
+        """创建简单的智能体（无搜索工具）"""
+        return ReActAgent(
             name="Friday",
             sys_prompt="You are a helpful assistant named Friday.",
-            model=OpenAIChatModel(
-                model_name=model_name,
-                api_key=api_key,
-                client_args={"base_url": base_url},
-                stream=False,
-            ),
-            formatter=OpenAIChatFormatter(),
+            model=model,
+            formatter=_FORMATTER,
             memory=InMemoryMemory(),
             toolkit=Toolkit(),  # 空工具包
         )
-        
-        # 测试简单问题
-        msg = Msg("user", "请简要介绍人工智能", "user")
-        result = await agent(msg)
-        
-        print("✅ 简单查询测试成功")
-        print(f"响应: {result.get_text_content()[:200]}...")
-        
+
+    try:
+        # 并发测试多个简单问题，每个问题使用独立的智能体以避免共享记忆
+        questions = [
+            "请简要介绍人工智能",
+            "请简要介绍机器学习",
+            "请简要介绍深度学习",
+        ]
+        results = await asyncio.gather(
+            *(
+                create_simple_agent()(Msg("user", question, "user"))
+                for question in questions
+            ),
+        )
+
+        logger.info("简单查询测试成功")
+        for question, result in zip(questions, results):
+            print(f"[{question}] 响应: {result.get_text_content()[:200]}...")
+
         return True
-        
+
     except Exception as e:
-        print(f"❌ 简单查询测试失败: {e}")
+        logger.error("简单查询测试失败: %s", e)
         return False
 
 
@@ -187,10 +214,13 @@ if __name__ == "__main__":
     print("2. 兼容版本深度研究（带搜索工具）")
     
     choice = input("请输入选择 (1 或 2): ").strip()
+
+    # 由后台线程写出日志，避免在事件循环中阻塞
+    enable_queue_logging()
     
     if choice == "1":
         try:
-            success = asyncio.run(test_simple_query())
+            success = run(test_simple_query())
             if success:
                 print("\n💡 简单查询成功，现在可以尝试选项2")
         except KeyboardInterrupt:
@@ -198,7 +228,7 @@ if __name__ == "__main__":
     else:
         query = "请简要介绍人工智能的发展历史"
         try:
-            asyncio.run(main_compatible(query))
+            run(main_compatible(query))
         except KeyboardInterrupt:
             print("\n⚠️ 用户中断")
         except Exception as e:
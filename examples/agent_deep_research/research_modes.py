@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""深度研究智能体的参数化运行入口，统一了修复版（fixed）、改进版（improved）
+和详细日志版（verbose）三种运行模式。
+
+用法::
+
+    python research_modes.py --mode improved "请简要介绍人工智能的发展历史"
+"""
+
+import argparse
+import asyncio
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Final
+
+import httpx
+
+# 加载环境变量
+try:
+    from dotenv import load_dotenv
+
+    env_path = Path(__file__).parent.parent.parent / ".env"
+    load_dotenv(env_path)
+except ImportError:
+    print("python-dotenv not installed.")
+
+from agentscope import logger
+from agentscope.agent import ReActAgent
+from agentscope.formatter import IncrementalOpenAIChatFormatter
+from agentscope.mcp import StatefulClientBase
+from agentscope.memory import InMemoryMemory
+from agentscope.message import Msg
+from agentscope.model import OpenAIChatModel
+from agentscope.tool import Toolkit
+
+from deep_research_agent import DeepResearchAgent  # pylint: disable=C0411
+from utils import (  # pylint: disable=C0411
+    close_tavily_client,
+    enable_queue_logging,
+    get_tavily_client,
+    run as run_loop,
+)
+
+# 同一事件循环中所有模型共享的 HTTP 客户端，在多次查询之间复用连接池和
+# TLS 会话。连接池绑定在创建它的事件循环上，由 `_get_http_client` 按需创建
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+# 专门优化的系统提示符。它是固定不变的模块级常量，不包含时间戳等动态内容，
+# 每次请求都以逐字节相同的前缀开头，以便命中服务端的前缀缓存
+_SYS_PROMPT_FROZEN: Final[str] = """You are Friday, an advanced research assistant. Your core capabilities:
+
+**Research Skills:**
+• Search current information using available tools
+• Analyze and synthesize data from multiple sources
+• Provide structured, accurate responses
+• Verify facts and cross-reference information
+
+**Response Guidelines:**
+• Be precise and factual
+• Structure information logically
+• Include relevant details and context
+• Cite sources when applicable
+
+**Tool Usage:**
+• Use tavily-search for finding information
+• Use tavily-extract for detailed content analysis
+• Keep searches focused and relevant
+
+Always prioritize accuracy and completeness in your research."""
+
+DEFAULT_QUERY: Final[str] = (
+    "如果埃利乌德·基普乔格能够无限期地保持他创纪录的"
+    "马拉松配速，那么他跑完地球到月球最近距离"
+    "需要多少千小时？请使用维基百科月球页面上的"
+    "最小近地点值来进行计算。将结果四舍五入"
+    "到最接近的1000小时，如有必要请不要使用"
+    "任何逗号分隔符。"
+)
+
+
+class ImprovedResearchAgent(ReActAgent):
+    """改进的研究智能体 - 专为SiliconFlow API优化"""
+
+    def __init__(self, *args, **kwargs):
+        """初始化优化的研究智能体，搜索工具需要通过 `create` 注册"""
+        # 替换系统提示符
+        if "sys_prompt" in kwargs:
+            kwargs["sys_prompt"] = _SYS_PROMPT_FROZEN
+
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    async def create(
+        cls,
+        *args,
+        search_mcp_client=None,
+        **kwargs,
+    ) -> "ImprovedResearchAgent":
+        """创建智能体，并在返回前完成搜索工具的注册，避免第一轮推理时工具尚未就绪"""
+        agent = cls(*args, **kwargs)
+        if search_mcp_client:
+            await agent._register_search_tools(search_mcp_client)
+        return agent
+
+    async def _register_search_tools(self, search_client):
+        """注册搜索工具"""
+        try:
+            await self.toolkit.register_mcp_client(search_client)
+            logger.info("✅ 搜索工具注册成功")
+        except Exception as e:
+            logger.warning(f"⚠️ 搜索工具注册失败: {e}")
+
+
+@dataclass(frozen=True)
+class _ModeConfig:
+    """一种运行模式的配置"""
+
+    title: str
+    improved_agent: bool
+    sys_prompt: str
+    default_model_name: str
+    stream: bool
+    generate_kwargs: dict = field(default_factory=dict)
+    max_iters: int | None = None
+    # 推理步骤（多为简短的工具调用）的输出长度上限，只在推理时覆盖
+    # `generate_kwargs` 中的 `max_tokens`，报告生成仍使用后者
+    reasoning_max_tokens: int | None = None
+
+
+_MODES: Final[dict[str, _ModeConfig]] = {
+    "fixed": _ModeConfig(
+        title="修复版",
+        improved_agent=False,
+        sys_prompt="You are Friday, a helpful research assistant.",
+        default_model_name="gpt-3.5-turbo",
+        stream=True,  # 流式输出，边生成边处理
+        generate_kwargs={
+            "temperature": 0.2,  # 较低的温度，输出更稳定
+            "max_tokens": 2048,  # 报告的长度上限
+        },
+        max_iters=5,  # 减少迭代次数
+        reasoning_max_tokens=1024,  # 推理轮次多为简短的工具调用
+    ),
+    "improved": _ModeConfig(
+        title="改进版",
+        improved_agent=True,
+        sys_prompt=_SYS_PROMPT_FROZEN,
+        default_model_name="deepseek-ai/DeepSeek-R1-Distill-Qwen-7B",
+        stream=False,  # 关闭流式输出以提高稳定性
+        generate_kwargs={
+            "temperature": 0.3,  # 降低温度以提高准确性
+            "max_tokens": 3000,
+            "top_p": 0.9,
+        },
+        max_iters=8,  # 适中的迭代次数
+    ),
+    "verbose": _ModeConfig(
+        title="详细日志版",
+        improved_agent=False,
+        sys_prompt="You are a helpful assistant named Friday.",
+        default_model_name="gpt-3.5-turbo",
+        stream=True,
+        generate_kwargs={
+            "temperature": 0.2,
+            "max_tokens": 4096,
+        },
+        reasoning_max_tokens=1024,
+    ),
+}
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """获取当前事件循环共享的 HTTP 客户端。首次调用、客户端被关闭后或事件
+    循环变化（例如再次调用 `asyncio.run`）时重新创建"""
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if (
+        _http_client is None
+        or _http_client.is_closed
+        or _http_client_loop is not loop
+    ):
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+def _build_model(config: _ModeConfig) -> OpenAIChatModel:
+    """根据环境变量和模式配置创建模型"""
+    api_key = os.environ.get("CUSTOM_OPENAI_API_KEY")
+    base_url = os.environ.get("CUSTOM_OPENAI_BASE_URL")
+    model_name = os.environ.get(
+        "CUSTOM_MODEL_NAME",
+        config.default_model_name,
+    )
+
+    if not api_key or not base_url:
+        raise ValueError(
+            "需要设置 CUSTOM_OPENAI_API_KEY 和 CUSTOM_OPENAI_BASE_URL",
+        )
+
+    print(f"   🎯 模型: {model_name}")
+    print(f"   🌐 API: {base_url}")
+
+    return OpenAIChatModel(
+        model_name=model_name,
+        api_key=api_key,
+        client_args={"base_url": base_url, "http_client": _get_http_client()},
+        stream=config.stream,
+        generate_kwargs=config.generate_kwargs,
+    )
+
+
+async def _build_agent(
+    config: _ModeConfig,
+    model: OpenAIChatModel,
+    search_mcp_client: StatefulClientBase,
+) -> ReActAgent:
+    """根据模式配置创建智能体，并在返回前完成搜索工具的注册"""
+    extra_kwargs = {}
+    if config.max_iters is not None:
+        extra_kwargs["max_iters"] = config.max_iters
+
+    if config.improved_agent:
+        return await ImprovedResearchAgent.create(
+            name="Friday",
+            sys_prompt=config.sys_prompt,
+            model=model,
+            formatter=IncrementalOpenAIChatFormatter(),
+            memory=InMemoryMemory(),
+            toolkit=Toolkit(),
+            search_mcp_client=search_mcp_client,
+            **extra_kwargs,
+        )
+
+    agent_working_dir = os.getenv(
+        "AGENT_OPERATION_DIR",
+        os.path.join(os.path.dirname(__file__), "deepresearch_agent_demo_env"),
+    )
+    os.makedirs(agent_working_dir, exist_ok=True)
+
+    agent = DeepResearchAgent(
+        name="Friday",
+        sys_prompt=config.sys_prompt,
+        model=model,
+        formatter=IncrementalOpenAIChatFormatter(),
+        memory=InMemoryMemory(),
+        search_mcp_client=search_mcp_client,
+        tmp_file_storage_dir=agent_working_dir,
+        reasoning_max_tokens=config.reasoning_max_tokens,
+        **extra_kwargs,
+    )
+    # 等待工具注册完成，注册结束后立即继续，而不是固定等待
+    await asyncio.wait_for(agent.tools_ready.wait(), timeout=10)
+    return agent
+
+
+async def close_clients() -> None:
+    """关闭共享的搜索客户端和 HTTP 客户端，之后的查询会重新创建它们"""
+    global _http_client, _http_client_loop
+    try:
+        await close_tavily_client()
+        if _http_client is not None:
+            client, _http_client, _http_client_loop = _http_client, None, None
+            await client.aclose()
+        print("\n🔌 清理完成")
+    except Exception:
+        # 忽略清理过程中的异常，但不阻止程序退出
+        pass
+
+
+async def run(
+    mode: str,
+    user_query: str,
+    close_clients_after: bool = True,
+) -> Msg | None:
+    """以指定模式执行一次深度研究
+
+    Args:
+        mode (`str`):
+            运行模式，可选 `"fixed"`、`"improved"` 和 `"verbose"`。
+        user_query (`str`):
+            研究主题。
+        close_clients_after (`bool`, defaults to `True`):
+            研究结束后是否关闭共享的客户端。为 `False` 时保留客户端供后续
+            查询复用，由调用方负责调用 `close_clients`。
+
+    Returns:
+        `Msg | None`:
+            智能体的研究报告，执行失败时为 `None`。
+    """
+    config = _MODES[mode]
+
+    print(f"🚀 启动{config.title}深度研究智能体...")
+    print(f"📝 研究主题: {user_query}")
+    print("=" * 60)
+
+    if not os.getenv("TAVILY_API_KEY"):
+        print("⚠️ 警告: 未设置 TAVILY_API_KEY，搜索功能可能受限")
+
+    result = None
+    try:
+        print(f"🤖 初始化{config.title}研究智能体...")
+        model = _build_model(config)
+
+        # 获取共享的搜索客户端，只在首次查询时启动并连接
+        print("🔗 正在连接到Tavily搜索客户端...")
+        tavily_search_client = await get_tavily_client()
+        print("✅ Tavily搜索客户端连接成功")
+
+        agent = await _build_agent(config, model, tavily_search_client)
+
+        print("✅ 智能体初始化完成")
+        print("🔍 开始深度研究...")
+        print("⏳ 请稍等，正在搜索和分析相关信息...")
+        print("=" * 60)
+
+        result = await agent(Msg("user", user_query, "user"))
+
+        print("\n" + "=" * 60)
+        print("🎉 研究完成!")
+        print("📋 研究报告:")
+        print("=" * 60)
+        print(result.get_text_content())
+        print("=" * 60)
+
+    except Exception as err:
+        logger.exception("❌ 执行过程中发生错误: %s", err)
+    finally:
+        if close_clients_after:
+            await close_clients()
+
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--mode",
+        choices=list(_MODES),
+        default="fixed",
+        help="运行模式",
+    )
+    parser.add_argument(
+        "query",
+        nargs="?",
+        default=DEFAULT_QUERY,
+        help="研究主题",
+    )
+    args = parser.parse_args()
+
+    # 由后台线程写出日志，避免在事件循环中阻塞
+    enable_queue_logging()
+    try:
+        run_loop(run(args.mode, args.query))
+    except KeyboardInterrupt:
+        print("\n⚠️ 研究被中断")
@@ -16,10 +16,15 @@ from agentscope.memory import InMemoryMemory
 from agentscope.model import OpenAIChatModel
 from agentscope.message import Msg
 
+from utils import run  # pylint: disable=C0411
+
+# 格式化器无状态，各测试共享同一个实例
+_FORMATTER = OpenAIChatFormatter()
+
 
 async def test_simple_conversation():
-    """测试简单对话以验证模型基本功能"""
-    print("🔍 测试简单对话...")
+    """测试简单对话以验证模型基本功能，返回是否成功和输出的各行"""
+    lines = ["🔍 测试简单对话..."]
     
     # Get custom OpenAI API configuration
     api_key = os.environ.get("CUSTOM_OPENAI_API_KEY")
@@ -38,7 +43,7 @@ async def test_simple_conversation():
         stream=False,  # 使用非流式以简化测试
     )
     
-    formatter = OpenAIChatFormatter()
+    formatter = _FORMATTER
     
     # 测试简单的系统提示和用户消息
     messages = [
@@ -48,29 +53,29 @@ async def test_simple_conversation():
     
     try:
         formatted_msgs = await formatter.format(messages)
-        print("✅ 消息格式化成功")
-        print(f"格式化后的消息: {formatted_msgs}")
+        lines.append("✅ 消息格式化成功")
+        lines.append(f"格式化后的消息: {formatted_msgs}")
         
         response = await model(formatted_msgs)
-        print("✅ 模型调用成功")
+        lines.append("✅ 模型调用成功")
         
         if hasattr(response, 'content') and response.content:
             for block in response.content:
                 block_dict = dict(block)
                 if block_dict.get("type") == "text":
-                    print(f"✅ 模型响应: {block_dict.get('text', '')}")
+                    lines.append(f"✅ 模型响应: {block_dict.get('text', '')}")
                     break
         
-        return True
+        return True, lines
         
     except Exception as e:
-        print(f"❌ 测试失败: {e}")
-        return False
+        lines.append(f"❌ 测试失败: {e}")
+        return False, lines
 
 
 async def test_conversation_with_multiple_messages():
-    """测试多轮对话消息序列"""
-    print("\n🔍 测试多轮对话消息序列...")
+    """测试多轮对话消息序列，返回是否成功和输出的各行"""
+    lines = ["\n🔍 测试多轮对话消息序列..."]
     
     api_key = os.environ.get("CUSTOM_OPENAI_API_KEY")
     base_url = os.environ.get("CUSTOM_OPENAI_BASE_URL")
@@ -83,7 +88,7 @@ async def test_conversation_with_multiple_messages():
         stream=False,
     )
     
-    formatter = OpenAIChatFormatter()
+    formatter = _FORMATTER
     
     # 模拟 Deep Research Agent 可能的消息序列
     messages = [
@@ -95,24 +100,24 @@ async def test_conversation_with_multiple_messages():
     
     try:
         formatted_msgs = await formatter.format(messages)
-        print("✅ 多轮消息格式化成功")
+        lines.append("✅ 多轮消息格式化成功")
         
         response = await model(formatted_msgs)
-        print("✅ 多轮对话模型调用成功")
+        lines.append("✅ 多轮对话模型调用成功")
         
         if hasattr(response, 'content') and response.content:
             for block in response.content:
                 block_dict = dict(block)
                 if block_dict.get("type") == "text":
                     text = block_dict.get('text', '')
-                    print(f"✅ 模型响应: {text[:100]}...")
+                    lines.append(f"✅ 模型响应: {text[:100]}...")
                     break
         
-        return True
+        return True, lines
         
     except Exception as e:
-        print(f"❌ 多轮对话测试失败: {e}")
-        return False
+        lines.append(f"❌ 多轮对话测试失败: {e}")
+        return False, lines
 
 
 async def main():
@@ -120,8 +125,15 @@ async def main():
     print("🚀 开始测试自定义模型兼容性...")
     print("=" * 60)
     
-    test1_success = await test_simple_conversation()
-    test2_success = await test_conversation_with_multiple_messages()
+    # 两个测试互不依赖，并发执行以重叠网络等待。各测试的输出在全部完成后
+    # 按顺序打印，避免两个测试的输出相互穿插
+    (test1_success, test1_lines), (test2_success, test2_lines) = (
+        await asyncio.gather(
+            test_simple_conversation(),
+            test_conversation_with_multiple_messages(),
+        )
+    )
+    print("\n".join(test1_lines + test2_lines))
     
     print("\n" + "=" * 60)
     if test1_success and test2_success:
@@ -132,4 +144,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -3,14 +3,29 @@
 import os
 import json
 import re
-from typing import Union, Sequence, Any, Type
+import asyncio
+import atexit
+import functools
+import queue
+import shutil
+import weakref
+from logging.handlers import QueueHandler, QueueListener
+from typing import Union, Sequence, Any, Type, Coroutine, TypeVar
 from pydantic import BaseModel
 
+from agentscope import logger
+from agentscope.mcp import StdIOStatefulClient
 from agentscope.tool import Toolkit, ToolResponse
 
 
 TOOL_RESULTS_MAX_WORDS = 5000
 
+T = TypeVar("T")
+
+# The Tavily MCP client shared by all the queries in this process
+_tavily_client: StdIOStatefulClient | None = None
+_tavily_client_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
 
 def get_prompt_from_file(
     file_path: str,
@@ -328,3 +343,82 @@ def load_prompt_dict() -> dict:
     )
 
     return prompt_dict
+
+
+def enable_queue_logging() -> QueueListener:
+    """Move the handlers of the agentscope logger behind a queue, so that
+    the log records are written by a background thread instead of blocking
+    the event loop. The listener is stopped and flushed at exit."""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue,
+        *logger.handlers,
+        respect_handler_level=True,
+    )
+    logger.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+@functools.cache
+def find_npx() -> str | None:
+    """Find the path of the `npx` command. The PATH is searched on the first
+    call only, instead of on every client creation."""
+    return shutil.which("npx")
+
+
+def _tavily_client_lock() -> asyncio.Lock:
+    """The lock guarding the shared Tavily MCP client in the running event
+    loop. An asyncio lock is bound to the first event loop that waits on it,
+    so each event loop uses its own."""
+    loop = asyncio.get_running_loop()
+    if loop not in _tavily_client_locks:
+        _tavily_client_locks[loop] = asyncio.Lock()
+    return _tavily_client_locks[loop]
+
+
+async def get_tavily_client() -> StdIOStatefulClient:
+    """Get the Tavily MCP client shared in this process. The client is
+    created and connected on the first call, so that the npx subprocess and
+    the MCP handshake are paid once rather than once per query. Call
+    `close_tavily_client` when all the queries are done."""
+    global _tavily_client
+    async with _tavily_client_lock():
+        if _tavily_client is None:
+            npx_path = find_npx()
+            if npx_path is None:
+                raise RuntimeError(
+                    "The npx command is not found, please install Node.js.",
+                )
+            client = StdIOStatefulClient(
+                name="tavily_mcp",
+                command=npx_path,
+                args=["-y", "tavily-mcp@latest"],
+                env={"TAVILY_API_KEY": os.getenv("TAVILY_API_KEY", "")},
+            )
+            await client.connect()
+            _tavily_client = client
+    return _tavily_client
+
+
+async def close_tavily_client() -> None:
+    """Close the shared Tavily MCP client if it has been connected."""
+    global _tavily_client
+    async with _tavily_client_lock():
+        if _tavily_client is not None and _tavily_client.is_connected:
+            await _tavily_client.close()
+        _tavily_client = None
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """Run the coroutine on the faster uvloop event loop when it's
+    installed (uvloop>=0.18 provides `uvloop.run`), and fall back to the
+    default asyncio event loop otherwise."""
+    try:
+        import uvloop
+
+        runner = uvloop.run
+    except (ImportError, AttributeError):
+        runner = asyncio.run
+    return runner(main)
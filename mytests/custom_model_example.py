@@ -8,8 +8,13 @@
 
 import os
 import asyncio
+import hashlib
+import json
+import weakref
+from copy import deepcopy
+import httpx
 from dotenv import load_dotenv
-from typing import AsyncGenerator, Any, List, Literal
+from typing import AsyncGenerator, Any, Final, List, Literal
 from datetime import datetime
 
 import agentscope
@@ -30,8 +35,52 @@ from agentscope.model import (
 from agentscope.tool import Toolkit, execute_python_code
 from agentscope.message import Msg
 
-# 加载环境变量
-load_dotenv()
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 加载环境变量。同一进程（及其子进程）中只解析一次 .env 文件
+if not os.environ.get("AGENTSCOPE_ENV_LOADED"):
+    load_dotenv()
+    os.environ["AGENTSCOPE_ENV_LOADED"] = "1"
+
+# 限制同时进行中的模型请求数，避免并发过高触发服务端限流后反复重试
+_LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "5"))
+_LLM_SEMAPHORES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# 交互模式的系统提示符。固定不变的前缀可以被服务端的前缀缓存复用，
+# 例如以 `--enable-prefix-caching` 启动的 vLLM 会直接复用它的 KV Cache
+_SYS_PROMPT_FROZEN: Final[str] = "你是一个有用的AI助手，可以回答问题和执行代码。"
+
+# 设置 LLM_RESPONSE_CACHE=1（或传入 response_cache=True）时缓存模型响应，
+# 相同请求直接读取磁盘结果
+_RESPONSE_CACHE_DIR = os.getenv("LLM_RESPONSE_CACHE_DIR", "./.cache/llm_responses")
+
+
+def _dumps_sorted(obj: Any) -> bytes:
+    """将对象序列化为键有序的 UTF-8 JSON，安装了 orjson 时使用更快的 orjson"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    ).encode("utf-8")
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    """当前事件循环的模型请求信号量。信号量绑定在首次等待它的事件循环上，
+    因此每个事件循环各用一个"""
+    loop = asyncio.get_running_loop()
+    if loop not in _LLM_SEMAPHORES:
+        _LLM_SEMAPHORES[loop] = asyncio.Semaphore(_LLM_MAX_CONCURRENCY)
+    return _LLM_SEMAPHORES[loop]
 
 
 # =============================================================================
@@ -58,6 +107,7 @@ class CustomOpenAICompatibleModel(ChatModelBase):
         stream: bool = True,
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        response_cache: bool | None = None,
         **kwargs: Any,
     ) -> None:
         """初始化自定义 OpenAI 兼容模型
@@ -69,6 +119,8 @@ class CustomOpenAICompatibleModel(ChatModelBase):
             stream: 是否使用流式输出
             temperature: 温度参数
             max_tokens: 最大输出 token 数
+            response_cache: 是否缓存模型响应，默认由环境变量
+                LLM_RESPONSE_CACHE 决定
         """
         super().__init__(model_name, stream)
 
@@ -77,9 +129,48 @@ class CustomOpenAICompatibleModel(ChatModelBase):
         except ImportError as e:
             raise ImportError("请安装 openai 库: pip install openai") from e
 
-        self.client = openai.AsyncClient(api_key=api_key, base_url=base_url, **kwargs)
+        self._client_kwargs = {"api_key": api_key, "base_url": base_url, **kwargs}
+        self._client = None
+        self._client_loop = None
         self.temperature = temperature
         self.max_tokens = max_tokens
+        if response_cache is None:
+            response_cache = os.getenv("LLM_RESPONSE_CACHE") == "1"
+        self.response_cache = response_cache
+
+    @property
+    def client(self):
+        """当前事件循环使用的 OpenAI 客户端
+
+        客户端的连接池绑定在创建它的事件循环上，因此在首次使用时创建，
+        并在事件循环变化（例如再次调用 `asyncio.run`）时重新创建。
+        同一事件循环中的所有请求复用同一个连接池和 TLS 会话。
+        """
+        import openai
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            kwargs = dict(self._client_kwargs)
+            kwargs.setdefault(
+                "http_client",
+                httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=64,
+                        max_connections=128,
+                    ),
+                ),
+            )
+            self._client = openai.AsyncClient(**kwargs)
+            self._client_loop = loop
+        return self._client
+
+    async def close(self) -> None:
+        """关闭当前事件循环中的客户端及其连接池，之后的调用会重新创建客户端"""
+        if self._client is not None:
+            if self._client_loop is asyncio.get_running_loop():
+                await self._client.close()
+            self._client = None
+            self._client_loop = None
 
     async def __call__(
         self,
@@ -106,24 +197,127 @@ class CustomOpenAICompatibleModel(ChatModelBase):
         if tool_choice:
             request_kwargs["tool_choice"] = tool_choice
 
+        if self.stream:
+            # 让最后一个数据块携带真实的 token 使用统计
+            request_kwargs["stream_options"] = {"include_usage": True}
+
+        cache_path = None
+        if self.response_cache:
+            cache_path = self._get_cache_path(request_kwargs)
+            if os.path.isfile(cache_path):
+                with open(cache_path, "rb") as f:
+                    cached = ChatResponse(
+                        content=json.loads(f.read())["content"],
+                    )
+                if self.stream:
+                    return self._replay_cached_response(cached)
+                return cached
+
+        if self.stream:
+            return self._stream_response(request_kwargs, cache_path)
+
         start_time = datetime.now()
 
         try:
-            response = await self.client.chat.completions.create(**request_kwargs)
-            
-            if self.stream:
-                return self._parse_stream_response(start_time, response)
-            else:
-                return self._parse_response(start_time, response)
-
+            async with _llm_semaphore():
+                response = await self.client.chat.completions.create(
+                    **request_kwargs,
+                )
         except Exception as e:
-            # 简单的错误处理
-            from agentscope.message import TextBlock
+            return self._error_response(e)
 
-            return ChatResponse(
-                content=[TextBlock(type="text", text=f"模型调用失败: {str(e)}")],
-                usage=None,
-            )
+        parsed = self._parse_response(start_time, response)
+        if cache_path:
+            # 只缓存调用成功的响应
+            with open(cache_path, "wb") as f:
+                f.write(_dumps_sorted({"content": list(parsed.content)}))
+        return parsed
+
+    async def generate_many(
+        self,
+        list_of_messages: list[list[dict]],
+        **kwargs: Any,
+    ) -> list[ChatResponse | AsyncGenerator[ChatResponse, None]]:
+        """并发发送多组消息并按顺序返回各自的响应
+
+        所有请求共享同一个 HTTP 连接池同时发出（仍受 `LLM_MAX_CONCURRENCY`
+        限制），vLLM 等支持连续批处理的服务端可以将它们合并到同一批次中解码，
+        适合批量研究多个主题的场景。
+
+        Args:
+            list_of_messages: 多组已格式化的消息
+            **kwargs: 传递给每次调用的其他参数
+        """
+        return await asyncio.gather(
+            *(self(messages, **kwargs) for messages in list_of_messages),
+        )
+
+    async def warmup(self) -> None:
+        """请求模型列表接口，提前完成 DNS 解析和 TCP/TLS 握手，之后的正式请求
+        可以直接复用已建立的连接。该请求不生成内容、不消耗 token，
+        也不会读写响应缓存。
+
+        预热失败（例如服务端未实现该接口）不影响后续调用，异常会被忽略。
+        """
+        try:
+            async with _llm_semaphore():
+                await self.client.models.list()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _get_cache_path(request_kwargs: dict) -> str:
+        """根据请求参数（模型、消息、工具和生成参数）计算缓存文件路径"""
+        os.makedirs(_RESPONSE_CACHE_DIR, exist_ok=True)
+        filename = hashlib.sha256(_dumps_sorted(request_kwargs)).hexdigest()
+        return os.path.join(_RESPONSE_CACHE_DIR, filename + ".json")
+
+    @staticmethod
+    async def _replay_cached_response(
+        response: ChatResponse,
+    ) -> AsyncGenerator[ChatResponse, None]:
+        """以流式接口一次性返回缓存的完整响应"""
+        yield response
+
+    @staticmethod
+    def _error_response(error: Exception) -> ChatResponse:
+        """将调用失败转换为文本响应（简单的错误处理）"""
+        from agentscope.message import TextBlock
+
+        return ChatResponse(
+            content=[TextBlock(type="text", text=f"模型调用失败: {str(error)}")],
+            usage=None,
+        )
+
+    async def _stream_response(
+        self,
+        request_kwargs: dict,
+        cache_path: str | None,
+    ) -> AsyncGenerator[ChatResponse, None]:
+        """发起流式请求并转发解析后的响应
+
+        从发起请求到数据流读完（或生成器被关闭）的整个过程都占用一个并发
+        名额，因此 `LLM_MAX_CONCURRENCY` 限制的是同时进行中的生成数。
+        设置了 `cache_path` 时，完整接收后将最后一个响应写入缓存。
+        """
+        last = None
+        async with _llm_semaphore():
+            start_time = datetime.now()
+            try:
+                response = await self.client.chat.completions.create(
+                    **request_kwargs,
+                )
+            except Exception as e:
+                yield self._error_response(e)
+                return
+
+            async for last in self._parse_stream_response(start_time, response):
+                yield last
+
+        if cache_path and last is not None:
+            # 只缓存完整接收的响应
+            with open(cache_path, "wb") as f:
+                f.write(_dumps_sorted({"content": list(last.content)}))
 
     def _parse_response(self, start_time: datetime, response) -> ChatResponse:
         """解析非流式响应"""
@@ -154,23 +348,27 @@ class CustomOpenAICompatibleModel(ChatModelBase):
         from agentscope.model._model_usage import ChatUsage
 
         accumulated_text = ""
+        usage = None
 
         async for chunk in response:
+            # 开启 include_usage 后，使用统计在最后一个（没有 choices 的）数据块中
+            if chunk.usage:
+                usage = ChatUsage(
+                    input_tokens=chunk.usage.prompt_tokens or 0,
+                    output_tokens=chunk.usage.completion_tokens or 0,
+                    time=(datetime.now() - start_time).total_seconds(),
+                )
+
             if chunk.choices and chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                accumulated_text += content
+                # 与 AgentScope 内置模型一致，每次产出截至目前的完整文本，
+                # 智能体以最后一个响应作为完整消息
+                accumulated_text += chunk.choices[0].delta.content
 
                 yield ChatResponse(
                     content=[TextBlock(type="text", text=accumulated_text)], usage=None
                 )
 
-        # 最终响应包含使用情况
-        usage = ChatUsage(
-            input_tokens=0,  # 流式响应通常不包含使用统计
-            output_tokens=0,
-            time=(datetime.now() - start_time).total_seconds(),
-        )
-
+        # 最终响应包含服务端返回的使用情况
         yield ChatResponse(
             content=[TextBlock(type="text", text=accumulated_text)], usage=usage
         )
@@ -229,7 +427,12 @@ def create_custom_openai_compatible_model():
 
 
 def create_vllm_model():
-    """创建 vLLM 部署的模型"""
+    """创建 vLLM 部署的模型
+
+    建议以 `vllm serve <model> --enable-prefix-caching --max-num-batched-tokens 8192`
+    启动服务，这样固定的系统提示符只需在首次请求时计算一次，
+    `generate_many` 并发发出的请求也能被合并到同一批次中解码
+    """
     return CustomOpenAICompatibleModel(
         model_name="Qwen/Qwen2.5-7B-Instruct",  # vLLM 部署的模型名
         api_key="EMPTY",  # vLLM 通常不需要真实的 API key
@@ -240,6 +443,28 @@ def create_vllm_model():
     ), OpenAIChatFormatter()
 
 
+# 智能体会向工具包注册自己的 `generate_response` 函数，因此工具包不能在智能体之间共享。
+# 这里只解析一次 `execute_python_code` 的 JSON Schema，之后创建工具包时直接复用
+def _get_execute_python_code_schema() -> dict:
+    """解析 `execute_python_code` 的 JSON Schema"""
+    tmp_toolkit = Toolkit()
+    tmp_toolkit.register_tool_function(execute_python_code)
+    return tmp_toolkit.get_json_schemas()[0]
+
+
+_EXECUTE_PYTHON_CODE_SCHEMA = _get_execute_python_code_schema()
+
+
+def create_toolkit() -> Toolkit:
+    """创建注册了 `execute_python_code` 的工具包，复用已解析的 JSON Schema"""
+    toolkit = Toolkit()
+    toolkit.register_tool_function(
+        execute_python_code,
+        json_schema=deepcopy(_EXECUTE_PYTHON_CODE_SCHEMA),
+    )
+    return toolkit
+
+
 # =============================================================================
 # 使用示例
 # =============================================================================
@@ -265,17 +490,16 @@ async def test_custom_models():
         "vLLM模型": create_vllm_model,
     }
 
-    for model_name, create_model_func in model_configs.items():
-        print(f"\n{'=' * 50}")
-        print(f"测试 {model_name} 模型")
-        print(f"{'=' * 50}")
+    async def run_one(model_name, create_model_func):
+        """创建并测试单个模型，返回要打印的结果"""
+        lines = [f"\n{'=' * 50}", f"测试 {model_name} 模型", f"{'=' * 50}"]
 
+        model = None
         try:
             model, formatter = create_model_func()
 
             # 为每个模型创建独立的工具包
-            toolkit = Toolkit()
-            toolkit.register_tool_function(execute_python_code)
+            toolkit = create_toolkit()
 
             # 创建智能体
             agent = ReActAgent(
@@ -286,16 +510,34 @@ async def test_custom_models():
                 toolkit=toolkit,
                 memory=InMemoryMemory(),
             )
+            # 多个智能体并发运行，流式输出会相互交错，结果统一在最后打印
+            agent.disable_console_output()
 
             # 测试对话
             test_msg = Msg("用户", f"你好！请介绍一下你使用的是什么模型。", "user")
 
             response = await agent(test_msg)
-            print(f"模型响应: {response.get_text_content()}")
+            lines.append(f"模型响应: {response.get_text_content()}")
 
         except Exception as e:
-            print(f"测试 {model_name} 模型时出错: {str(e)}")
-            continue
+            lines.append(f"测试 {model_name} 模型时出错: {str(e)}")
+
+        finally:
+            if isinstance(model, CustomOpenAICompatibleModel):
+                await model.close()
+
+        return "\n".join(lines)
+
+    # 各模型之间互不依赖，并发测试以重叠网络等待
+    results = await asyncio.gather(
+        *(
+            run_one(model_name, create_model_func)
+            for model_name, create_model_func in model_configs.items()
+        ),
+        return_exceptions=True,
+    )
+    for result in results:
+        print(result)
 
 
 async def interactive_custom_model():
@@ -316,7 +558,8 @@ async def interactive_custom_model():
     print("4. 自定义 OpenAI 兼容模型")
     print("5. vLLM 部署模型")
 
-    choice = input("请选择模型 (1-5): ").strip()
+    # 在线程中等待输入，避免阻塞事件循环
+    choice = (await asyncio.to_thread(input, "请选择模型 (1-5): ")).strip()
 
     model_map = {
         "1": create_dashscope_model,
@@ -330,15 +573,15 @@ async def interactive_custom_model():
         print("无效选择，使用默认 DashScope 模型")
         choice = "1"
 
+    model = None
     try:
         model, formatter = model_map[choice]()
 
-        toolkit = Toolkit()
-        toolkit.register_tool_function(execute_python_code)
+        toolkit = create_toolkit()
 
         agent = ReActAgent(
             name="自定义模型助手",
-            sys_prompt="你是一个有用的AI助手，可以回答问题和执行代码。",
+            sys_prompt=_SYS_PROMPT_FROZEN,
             model=model,
             formatter=formatter,
             toolkit=toolkit,
@@ -359,15 +602,20 @@ async def interactive_custom_model():
     except Exception as e:
         print(f"初始化模型失败: {str(e)}")
         print("请检查 .env 文件中的配置是否正确")
+    finally:
+        if isinstance(model, CustomOpenAICompatibleModel):
+            await model.close()
 
 
 if __name__ == "__main__":
+    from utils import run  # pylint: disable=C0411
+
     print("AgentScope 自定义模型配置示例")
     print("=" * 50)
 
     mode = input("选择运行模式 (1: 批量测试, 2: 交互式): ").strip()
 
     if mode == "1":
-        asyncio.run(test_custom_models())
+        run(test_custom_models())
     else:
-        asyncio.run(interactive_custom_model())
+        run(interactive_custom_model())
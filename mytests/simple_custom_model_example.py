@@ -6,22 +6,143 @@
 """
 
 import os
+import sys
 import asyncio
+import functools
+from dataclasses import dataclass
+from typing import Callable, Final
 from dotenv import load_dotenv
 
 import agentscope
 from agentscope.agent import ReActAgent
-from agentscope.model import OpenAIChatModel, DashScopeChatModel, OllamaChatModel
 from agentscope.formatter import (
-    OpenAIChatFormatter,
     DashScopeChatFormatter,
+    FormatterBase,
     OllamaChatFormatter,
+    OpenAIChatFormatter,
 )
 from agentscope.memory import InMemoryMemory
 from agentscope.message import Msg
+from agentscope.model import (
+    ChatModelBase,
+    DashScopeChatModel,
+    OllamaChatModel,
+    OpenAIChatModel,
+)
+
 
-# 加载环境变量
-load_dotenv()
+@functools.cache
+def env(name: str, default: str | None = None) -> str | None:
+    """读取环境变量，同一变量只查询一次"""
+    return os.environ.get(name, default)
+
+
+# 加载环境变量。同一进程（及其子进程）中只解析一次 .env 文件
+if not os.environ.get("AGENTSCOPE_ENV_LOADED"):
+    load_dotenv()
+    os.environ["AGENTSCOPE_ENV_LOADED"] = "1"
+
+
+# 输出到终端时使用流式输出；被重定向或管道读取时没有人逐字查看，
+# 直接获取完整响应，省去逐块解析 SSE 数据
+_STREAM: Final[bool] = sys.stdout.isatty()
+
+# 固定的测试消息
+_HELLO_TEXT: Final[str] = "你好！请介绍一下你自己。"
+
+
+@functools.cache
+def _sys_prompt(model_name: str) -> str:
+    """生成系统提示符，同一模型始终得到同一个字符串"""
+    return f"你是使用 {model_name} 的智能助手。请简要介绍你自己和你的能力。"
+
+
+@dataclass(frozen=True)
+class _ModelConfig:
+    """一种模型的配置"""
+
+    label: str
+    """显示名称"""
+
+    model_cls: type[ChatModelBase]
+    """模型类"""
+
+    formatter_cls: type[FormatterBase]
+    """格式化器类"""
+
+    model_kwargs: Callable[[str | None], dict]
+    """根据 API 密钥（及其他环境变量）生成模型的构造参数"""
+
+    key_env: str | None = None
+    """必需的 API 密钥环境变量，为空表示不需要"""
+
+
+def _openai_kwargs(api_key: str | None) -> dict:
+    """OpenAI 的构造参数，只有当 organization 存在时才添加该参数"""
+    kwargs = {"model_name": "gpt-4", "api_key": api_key}
+    org_id = env("OPENAI_ORG_ID")
+    if org_id:
+        kwargs["organization"] = org_id
+    return kwargs
+
+
+MODEL_REGISTRY: Final[dict[str, _ModelConfig]] = {
+    "1": _ModelConfig(
+        label="DashScope",
+        model_cls=DashScopeChatModel,
+        formatter_cls=DashScopeChatFormatter,
+        model_kwargs=lambda key: {"model_name": "qwen-max", "api_key": key},
+        key_env="DASHSCOPE_API_KEY",
+    ),
+    "2": _ModelConfig(
+        label="OpenAI",
+        model_cls=OpenAIChatModel,
+        formatter_cls=OpenAIChatFormatter,
+        model_kwargs=_openai_kwargs,
+        key_env="OPENAI_API_KEY",
+    ),
+    # Ollama 本地模型
+    "3": _ModelConfig(
+        label="Ollama",
+        model_cls=OllamaChatModel,
+        formatter_cls=OllamaChatFormatter,
+        model_kwargs=lambda _: {
+            "model_name": env("OLLAMA_MODEL_NAME", "llama3:latest"),
+            "host": env("OLLAMA_HOST", "http://localhost:11434"),
+        },
+    ),
+    # 自定义 OpenAI 兼容模型 (如 vLLM, FastChat 等)
+    "4": _ModelConfig(
+        label="自定义模型",
+        model_cls=OpenAIChatModel,
+        formatter_cls=OpenAIChatFormatter,
+        model_kwargs=lambda _: {
+            "model_name": env("CUSTOM_MODEL_NAME", "custom-model"),
+            "api_key": env("CUSTOM_OPENAI_API_KEY", "EMPTY"),
+            "client_args": {
+                "base_url": env(
+                    "CUSTOM_OPENAI_BASE_URL",
+                    "http://localhost:8000/v1",
+                ),
+            },
+        },
+    ),
+}
+
+
+def _build(config: _ModelConfig):
+    """根据配置创建 (模型, 格式化器)"""
+    api_key = None
+    if config.key_env:
+        api_key = env(config.key_env)
+        if not api_key:
+            raise ValueError(f"{config.key_env} 环境变量未设置")
+
+    model = config.model_cls(
+        **config.model_kwargs(api_key),
+        stream=_STREAM,
+    )
+    return model, config.formatter_cls()
 
 
 async def main():
@@ -29,10 +150,10 @@ async def main():
 
     # 从环境变量初始化 AgentScope
     agentscope.init(
-        project=os.environ.get("PROJECT_NAME", "自定义模型项目"),
-        name=os.environ.get("RUN_NAME", "测试运行"),
-        studio_url=os.environ.get("STUDIO_URL"),
-        logging_level=os.environ.get("LOGGING_LEVEL", "INFO"),
+        project=env("PROJECT_NAME", "自定义模型项目"),
+        name=env("RUN_NAME", "测试运行"),
+        studio_url=env("STUDIO_URL"),
+        logging_level=env("LOGGING_LEVEL", "INFO"),
     )
 
     print("可用的模型配置:")
@@ -41,96 +162,31 @@ async def main():
     print("3. Ollama 本地模型 (从 .env 读取)")
     print("4. 自定义 OpenAI 兼容模型 (从 .env 读取)")
 
-    choice = input("请选择模型 (1-4): ").strip()
+    # 在线程中等待用户输入，不阻塞事件循环
+    choice = (await asyncio.to_thread(input, "请选择模型 (1-4): ")).strip()
 
     # 根据选择创建模型和格式化器
-    if choice == "1":
-        # DashScope 配置
-        dashscope_key = os.environ.get("DASHSCOPE_API_KEY")
-        if not dashscope_key:
-            raise ValueError("DASHSCOPE_API_KEY 环境变量未设置")
-
-        model = DashScopeChatModel(
-            model_name="qwen-max",
-            api_key=dashscope_key,
-            stream=True,
-        )
-        formatter = DashScopeChatFormatter()
-        model_name = "DashScope"
-
-    elif choice == "2":
-        # OpenAI 配置
-        openai_key = os.environ.get("OPENAI_API_KEY")
-        if not openai_key:
-            raise ValueError("OPENAI_API_KEY 环境变量未设置")
-
-        # 构建参数字典
-        openai_args = {
-            "model_name": "gpt-4",
-            "api_key": openai_key,
-            "stream": True,
-        }
-
-        # 只有当 organization 存在时才添加该参数
-        org_id = os.environ.get("OPENAI_ORG_ID")
-        if org_id:
-            openai_args["organization"] = org_id
-
-        model = OpenAIChatModel(**openai_args)
-        formatter = OpenAIChatFormatter()
-        model_name = "OpenAI"
-
-    elif choice == "3":
-        # Ollama 本地模型配置
-        model = OllamaChatModel(
-            model_name=os.environ.get("OLLAMA_MODEL_NAME", "llama3:latest"),
-            host=os.environ.get("OLLAMA_HOST", "http://localhost:11434"),
-            stream=True,
-        )
-        formatter = OllamaChatFormatter()
-        model_name = "Ollama"
-
-    elif choice == "4":
-        # 自定义 OpenAI 兼容模型 (如 vLLM, FastChat 等)
-        model = OpenAIChatModel(
-            model_name=os.environ.get("CUSTOM_MODEL_NAME", "custom-model"),
-            api_key=os.environ.get("CUSTOM_OPENAI_API_KEY", "EMPTY"),
-            client_args={
-                "base_url": os.environ.get(
-                    "CUSTOM_OPENAI_BASE_URL", "http://localhost:8000/v1"
-                )
-            },
-            stream=True,
-        )
-        formatter = OpenAIChatFormatter()
-        model_name = "自定义模型"
-
-    else:
+    config = MODEL_REGISTRY.get(choice)
+    if config is None:
         print("无效选择，使用默认 DashScope")
-        dashscope_key = os.environ.get("DASHSCOPE_API_KEY")
-        if not dashscope_key:
-            raise ValueError("DASHSCOPE_API_KEY 环境变量未设置")
-
-        model = DashScopeChatModel(
-            model_name="qwen-max",
-            api_key=dashscope_key,
-            stream=True,
-        )
-        formatter = DashScopeChatFormatter()
-        model_name = "DashScope (默认)"
+        config = MODEL_REGISTRY["1"]
+        model_name = f"{config.label} (默认)"
+    else:
+        model_name = config.label
+    model, formatter = _build(config)
 
     try:
         # 创建智能体
         agent = ReActAgent(
             name=f"{model_name}助手",
-            sys_prompt=f"你是使用 {model_name} 的智能助手。请简要介绍你自己和你的能力。",
+            sys_prompt=_sys_prompt(model_name),
             model=model,
             formatter=formatter,
             memory=InMemoryMemory(),
         )
 
         # 测试消息
-        test_msg = Msg("用户", "你好！请介绍一下你自己。", "user")
+        test_msg = Msg("用户", _HELLO_TEXT, "user")
 
         print(f"\n使用 {model_name} 模型进行对话...")
         print("-" * 50)
@@ -141,7 +197,7 @@ async def main():
         print("\n✅ 模型配置成功！")
         print(
             "你可以在 Studio 中查看这次对话：",
-            os.environ.get("STUDIO_URL", "Studio未配置"),
+            env("STUDIO_URL", "Studio未配置"),
         )
 
     except Exception as e:
@@ -153,4 +209,6 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    from utils import run  # pylint: disable=C0411
+
+    run(main())
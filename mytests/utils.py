@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""自定义模型示例的通用工具"""
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """运行协程：安装了 uvloop（>=0.18 才提供 `uvloop.run`）时使用更快的
+    uvloop 事件循环，否则使用默认的 asyncio 事件循环"""
+    try:
+        import uvloop
+
+        runner = uvloop.run
+    except (ImportError, AttributeError):
+        runner = asyncio.run
+    return runner(main)
@@ -14,6 +14,7 @@ from ._anthropic_formatter import (
 from ._openai_formatter import (
     OpenAIChatFormatter,
     OpenAIMultiAgentFormatter,
+    IncrementalOpenAIChatFormatter,
 )
 from ._gemini_formatter import (
     GeminiChatFormatter,
@@ -35,6 +36,7 @@ __all__ = [
     "DashScopeMultiAgentFormatter",
     "OpenAIChatFormatter",
     "OpenAIMultiAgentFormatter",
+    "IncrementalOpenAIChatFormatter",
     "AnthropicChatFormatter",
     "AnthropicMultiAgentFormatter",
     "GeminiChatFormatter",
@@ -22,6 +22,7 @@ from ..message import (
     ToolResultBlock,
 )
 from ..token import TokenCounterBase
+from ..tracing import trace_format
 
 
 def _to_openai_image_url(url: str) -> str:
@@ -248,6 +249,52 @@ class OpenAIChatFormatter(TruncatedFormatterBase):
         return messages
 
 
+class IncrementalOpenAIChatFormatter(OpenAIChatFormatter):
+    """An OpenAI chat formatter that caches the formatted output of each
+    message by its id. Since the agent re-formats the whole dialogue history
+    in every reasoning step, only the newly added messages are formatted and
+    the cached prefix is reused.
+
+    .. note:: The OpenAI chat formatter formats each message independently,
+     and the messages in memory are not modified after being recorded, so
+     that the cached output stays valid. If token counter and max tokens are
+     provided, the cache is bypassed because truncation may rewrite the
+     history.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the incremental formatter."""
+        super().__init__(*args, **kwargs)
+        self._cached_formatted: dict[str, list[dict[str, Any]]] = {}
+
+    @trace_format
+    async def format(
+        self,
+        msgs: list[Msg],
+        **kwargs: Any,
+    ) -> list[dict[str, Any]]:
+        """Format the input messages, reusing the cached output of the
+        messages that have been formatted before."""
+        if self.token_counter is not None and self.max_tokens is not None:
+            return await super().format(msgs, **kwargs)
+
+        self.assert_list_of_msgs(msgs)
+
+        cached_formatted = {}
+        formatted_msgs = []
+        for msg in msgs:
+            formatted = self._cached_formatted.get(msg.id)
+            if formatted is None:
+                formatted = await self._format([msg])
+            cached_formatted[msg.id] = formatted
+            formatted_msgs.extend(formatted)
+
+        # Only keep the messages in the current dialogue, so that deleted
+        # messages and the per-step system prompt are evicted
+        self._cached_formatted = cached_formatted
+        return formatted_msgs
+
+
 class OpenAIMultiAgentFormatter(TruncatedFormatterBase):
     """
     OpenAI formatter for multi-agent conversations, where more than
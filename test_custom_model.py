@@ -5,64 +5,220 @@
 """
 
 import os
+import sys
 import asyncio
+import functools
+import math
+import time
+from typing import Final
 from dotenv import load_dotenv
 
 import agentscope
 from agentscope.agent import ReActAgent, UserAgent
 from agentscope.formatter import OpenAIChatFormatter
 from agentscope.memory import InMemoryMemory
-from agentscope.tool import Toolkit, execute_python_code
 from agentscope.message import Msg
 
+from mytests.utils import run
+
 # 导入自定义模型类
-from mytests.custom_model_example import CustomOpenAICompatibleModel
+from mytests.custom_model_example import (
+    CustomOpenAICompatibleModel,
+    create_toolkit,
+)
 
-# 加载环境变量
-load_dotenv()
 
+@functools.cache
+def env(name: str, default: str | None = None) -> str | None:
+    """读取环境变量，同一变量只查询一次"""
+    return os.environ.get(name, default)
 
-def create_custom_model():
-    """创建自定义 OpenAI 兼容模型"""
-    api_key = os.environ.get("CUSTOM_OPENAI_API_KEY")
-    base_url = os.environ.get("CUSTOM_OPENAI_BASE_URL")
-    model_name = os.environ.get("CUSTOM_MODEL_NAME")
-    
-    if not api_key:
-        raise ValueError("请在 .env 文件中设置 CUSTOM_OPENAI_API_KEY")
-    if not base_url:
-        raise ValueError("请在 .env 文件中设置 CUSTOM_OPENAI_BASE_URL")
-    if not model_name:
-        raise ValueError("请在 .env 文件中设置 CUSTOM_MODEL_NAME")
-    
+
+# 加载环境变量。同一进程（及其子进程）中只解析一次 .env 文件
+if not os.environ.get("AGENTSCOPE_ENV_LOADED"):
+    load_dotenv()
+    os.environ["AGENTSCOPE_ENV_LOADED"] = "1"
+
+
+# 固定不变的提示词和测试消息。每次请求的前缀逐字节相同，
+# 既能命中本地响应缓存，也能命中服务端的前缀缓存
+_TEST_SYS_PROMPT: Final[str] = (
+    "你是一个有用的AI助手。请简要介绍你自己，并说明你可以帮助用户做什么。"
+)
+_CHAT_SYS_PROMPT: Final[str] = "你是一个有用的AI助手，可以回答问题和执行Python代码。"
+_HELLO_TEXT: Final[str] = "你好！请介绍一下你自己，并告诉我你可以做什么。"
+
+# 结束交互对话的命令
+_EXIT_COMMANDS: Final[frozenset[str]] = frozenset({"exit", "quit", ":q"})
+
+# 格式化器只保存配置、不保存对话状态，所有智能体共用同一个实例
+_FORMATTER = OpenAIChatFormatter()
+
+# 自定义模型必需的环境变量
+_REQUIRED_VARS: Final[frozenset[str]] = frozenset(
+    {
+        "CUSTOM_OPENAI_API_KEY",
+        "CUSTOM_OPENAI_BASE_URL",
+        "CUSTOM_MODEL_NAME",
+    },
+)
+
+
+def _require(names: frozenset[str]) -> None:
+    """检查环境变量均已设置且不为空，缺少时抛出 ValueError"""
+    missing = names - {name for name in names if env(name)}
+    if missing:
+        raise ValueError(f"缺少必要的环境变量: {', '.join(sorted(missing))}")
+
+
+_INITED = False
+
+
+def _init_once(**kwargs) -> None:
+    """只初始化一次 AgentScope，同一进程中再次调用时直接返回，
+    避免重复安装日志处理器和重复连接 Studio"""
+    global _INITED
+    if _INITED:
+        return
+    agentscope.init(**kwargs)
+    _INITED = True
+
+
+def _print_model_config() -> None:
+    """打印自定义模型的配置"""
+    _require(_REQUIRED_VARS)
     print(f"🔧 配置自定义模型:")
-    print(f"   模型名称: {model_name}")
-    print(f"   服务地址: {base_url}")
-    print(f"   API Key: {api_key[:20]}...")
+    print(f"   模型名称: {env('CUSTOM_MODEL_NAME')}")
+    print(f"   服务地址: {env('CUSTOM_OPENAI_BASE_URL')}")
+    print(f"   API Key: {env('CUSTOM_OPENAI_API_KEY')[:20]}...")
+
+
+def create_custom_model(print_config: bool = True):
+    """创建自定义 OpenAI 兼容模型
+
+    Args:
+        print_config: 是否打印模型配置。在线程中创建模型时应由调用方事先
+            打印，避免输出与同时等待的输入提示交错
+    """
+    _require(_REQUIRED_VARS)
+    api_key, base_url, model_name = map(
+        env,
+        ("CUSTOM_OPENAI_API_KEY", "CUSTOM_OPENAI_BASE_URL", "CUSTOM_MODEL_NAME"),
+    )
+    
+    if print_config:
+        _print_model_config()
     
     model = CustomOpenAICompatibleModel(
         model_name=model_name,
         api_key=api_key,
         base_url=base_url,
-        temperature=float(os.environ.get("CUSTOM_MODEL_TEMPERATURE", "0.7")),
-        max_tokens=int(os.environ.get("CUSTOM_MODEL_MAX_TOKENS", "2048")),
-        stream=False,  # 暂时使用非流式模式
+        temperature=float(env("CUSTOM_MODEL_TEMPERATURE", "0.7")),
+        max_tokens=int(env("CUSTOM_MODEL_MAX_TOKENS", "2048")),
+        stream=True,  # 流式输出，首个 token 生成后立即显示
+        # 设置 LLM_RESPONSE_CACHE=1 时缓存成功的响应，重复运行相同的测试消息
+        # 时不再请求模型服务。默认关闭，确保每次测试都真正访问模型服务
+        response_cache=env("LLM_RESPONSE_CACHE") == "1",
+        # 遇到 429、5xx 和连接错误时按指数退避加随机抖动自动重试
+        max_retries=int(env("CUSTOM_MODEL_MAX_RETRIES", "3")),
     )
     
-    formatter = OpenAIChatFormatter()
-    
-    return model, formatter
+    return model, _FORMATTER
+
+
+class _SentenceBufferedStdout:
+    """包装标准输出，流式输出的片段先留在缓冲区中，遇到句末标点、换行或
+    距上次刷新超过 `interval` 秒时才写出，减少逐个 token 写出的系统调用"""
+
+    _BOUNDARIES = ("。", "！", "？", ".", "!", "?", "\n")
+
+    def __init__(self, stream, interval: float = 0.05) -> None:
+        self._stream = stream
+        self._interval = interval
+        self._last_flush = time.monotonic()
+
+    def write(self, s: str) -> int:
+        """写入缓冲区，需要时刷新"""
+        n = self._stream.write(s)
+        now = time.monotonic()
+        if (
+            s.endswith(self._BOUNDARIES)
+            or now - self._last_flush >= self._interval
+        ):
+            self._stream.flush()
+            self._last_flush = now
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+async def aio_input(prompt: str) -> str:
+    """在线程中读取用户输入，等待输入时不阻塞事件循环"""
+    return await asyncio.to_thread(input, prompt)
 
 
-async def test_custom_model():
-    """测试自定义模型"""
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """按最近秩法计算已排序数据的第 q 百分位数"""
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+async def _run_probes(model, formatter, n: int) -> None:
+    """并发发送 n 个互不相关的探测请求，打印各请求耗时的 p50 和 p99
+
+    每个请求使用独立的智能体和记忆，同时受 `LLM_MAX_CONCURRENCY` 限制。
+    """
+
+    async def probe(i: int) -> float:
+        agent = ReActAgent(
+            name=f"探测{i}",
+            sys_prompt=_TEST_SYS_PROMPT,
+            model=model,
+            formatter=formatter,
+            toolkit=create_toolkit(),
+            memory=InMemoryMemory(),
+        )
+        # 并发输出会相互穿插，探测请求不打印回复
+        agent.disable_console_output()
+        start = time.monotonic()
+        await agent(Msg("用户", f"回答数字{i}", "user"))
+        return time.monotonic() - start
+
+    print(f"📊 并发发送 {n} 个探测请求...")
+    if getattr(model, "response_cache", False):
+        print("   注意: 已启用响应缓存，重复运行时耗时可能来自缓存")
+
+    start = time.monotonic()
+    results = await asyncio.gather(
+        *(probe(i) for i in range(n)),
+        return_exceptions=True,
+    )
+    elapsed = time.monotonic() - start
+
+    durations = sorted(r for r in results if isinstance(r, float))
+    print(f"   成功 {len(durations)}/{n}，总耗时 {elapsed:.2f}s")
+    if durations:
+        print(
+            f"   p50 {_percentile(durations, 50):.2f}s，"
+            f"p99 {_percentile(durations, 99):.2f}s",
+        )
+
+
+async def test_custom_model(model=None, formatter=None):
+    """测试自定义模型
+
+    Args:
+        model: 预先创建的模型，为空时调用 `create_custom_model` 创建
+        formatter: 与模型配套的格式化器
+    """
     
     # 初始化 AgentScope（不连接 Studio）
-    agentscope.init(
-        project=os.environ.get("PROJECT_NAME", "自定义模型测试"),
-        name=os.environ.get("RUN_NAME", "自定义模型运行"),
-        studio_url=os.environ.get("STUDIO_URL"),  # 暂时不连接 Studio
-        logging_level=os.environ.get("LOGGING_LEVEL", "INFO")
+    _init_once(
+        project=env("PROJECT_NAME", "自定义模型测试"),
+        name=env("RUN_NAME", "自定义模型运行"),
+        studio_url=env("STUDIO_URL"),  # 暂时不连接 Studio
+        logging_level=env("LOGGING_LEVEL", "INFO")
     )
     
     print("🚀 开始测试自定义 OpenAI 兼容模型...")
@@ -70,16 +226,16 @@ async def test_custom_model():
     
     try:
         # 创建模型
-        model, formatter = create_custom_model()
-        
-        # 创建工具包
-        toolkit = Toolkit()
-        toolkit.register_tool_function(execute_python_code)
+        if model is None:
+            model, formatter = create_custom_model()
+
+        # 创建工具包，复用已解析的工具 JSON Schema
+        toolkit = create_toolkit()
         
         # 创建智能体
         agent = ReActAgent(
             name="自定义模型助手",
-            sys_prompt="你是一个有用的AI助手。请简要介绍你自己，并说明你可以帮助用户做什么。",
+            sys_prompt=_TEST_SYS_PROMPT,
             model=model,
             formatter=formatter,
             toolkit=toolkit,
@@ -87,22 +243,22 @@ async def test_custom_model():
         )
         
         # 测试消息
-        test_msg = Msg(
-            "用户", 
-            "你好！请介绍一下你自己，并告诉我你可以做什么。", 
-            "user"
-        )
+        test_msg = Msg("用户", _HELLO_TEXT, "user")
         
         print("💬 发送测试消息...")
-        response = await agent(test_msg)
-        
         print("✅ 模型响应:")
         print("-" * 40)
-        print(response.get_text_content())
+        # 智能体在接收流式响应的同时逐段打印，无需等待完整回复
+        await agent(test_msg)
         print("-" * 40)
+
+        # 设置 CUSTOM_MODEL_PROBE_N 大于 1 时，再并发发送多个探测请求测量吞吐
+        probe_n = int(env("CUSTOM_MODEL_PROBE_N", "1"))
+        if probe_n > 1:
+            await _run_probes(model, formatter, probe_n)
         
         print("\n🎯 测试成功！你可以在 Studio 中查看详细信息:")
-        print(f"   {os.environ.get('STUDIO_FRONTEND_URL', 'Studio未配置')}")
+        print(f"   {env('STUDIO_FRONTEND_URL', 'Studio未配置')}")
         
         return True
         
@@ -116,25 +272,30 @@ async def test_custom_model():
         return False
 
 
-async def interactive_chat():
-    """交互式对话"""
+async def interactive_chat(model=None, formatter=None):
+    """交互式对话
+
+    Args:
+        model: 预先创建的模型，为空时调用 `create_custom_model` 创建
+        formatter: 与模型配套的格式化器
+    """
     
-    agentscope.init(
+    _init_once(
         project="自定义模型交互测试",
         name="交互对话",
-        studio_url=os.environ.get("STUDIO_URL"),  # 暂时不连接 Studio
+        studio_url=env("STUDIO_URL"),  # 暂时不连接 Studio
         logging_level="INFO"
     )
     
     try:
-        model, formatter = create_custom_model()
+        if model is None:
+            model, formatter = create_custom_model()
         
-        toolkit = Toolkit()
-        toolkit.register_tool_function(execute_python_code)
+        toolkit = create_toolkit()
         
         agent = ReActAgent(
             name="自定义模型助手",
-            sys_prompt="你是一个有用的AI助手，可以回答问题和执行Python代码。",
+            sys_prompt=_CHAT_SYS_PROMPT,
             model=model,
             formatter=formatter,
             toolkit=toolkit,
@@ -143,17 +304,25 @@ async def interactive_chat():
         
         user = UserAgent(name="用户")
         
-        print("\n💬 开始与自定义模型对话 (输入 'exit' 退出):")
+        print("\n💬 开始与自定义模型对话 (输入 'exit'、'quit' 或 ':q' 退出):")
         print("=" * 50)
         
+        # 智能体回复完毕后再提示输入下一条消息，避免提示符与流式输出的
+        # 回复交错在同一行。回复期间的按键已由终端缓冲，不会丢失
         msg = None
         while True:
             msg = await user(msg)
+            # 退出命令不交给智能体，直接结束对话
             content = msg.get_text_content()
-            if content and content.lower() == "exit":
+            if content and content.strip().lower() in _EXIT_COMMANDS:
                 print("👋 对话结束！")
                 break
-            msg = await agent(msg)
+            # 单条消息回复失败时报告错误，继续对话
+            try:
+                msg = await agent(msg)
+            except Exception as e:
+                print(f"\n❌ 回复失败: {str(e)}")
+                msg = None
     
     except Exception as e:
         print(f"❌ 初始化失败: {str(e)}")
@@ -164,21 +333,50 @@ if __name__ == "__main__":
     print("=" * 50)
     
     # 检查必要的环境变量
-    required_vars = ["CUSTOM_OPENAI_API_KEY", "CUSTOM_OPENAI_BASE_URL", "CUSTOM_MODEL_NAME"]
-    missing_vars = [var for var in required_vars if not os.environ.get(var)]
-    
-    if missing_vars:
-        print(f"❌ 缺少必要的环境变量: {', '.join(missing_vars)}")
+    try:
+        _require(_REQUIRED_VARS)
+    except ValueError as e:
+        print(f"❌ {e}")
         print("请在 .env 文件中配置这些变量。")
         exit(1)
     
-    mode = input("选择模式 (1: 快速测试, 2: 交互对话): ").strip()
-    
-    if mode == "1":
-        result = asyncio.run(test_custom_model())
-        if result:
-            print("\n🎉 自定义模型配置成功！")
-        else:
-            print("\n💡 请根据上面的提示检查配置。")
-    else:
-        asyncio.run(interactive_chat())
\ No newline at end of file
+    # 流式输出中不含换行的片段按句子或时间间隔批量写出，既能及时显示又不必
+    # 每个 token 一次系统调用
+    sys.stdout = _SentenceBufferedStdout(sys.stdout)
+
+    async def bootstrap():
+        """在用户选择模式的同时创建模型，并在等待输入期间预热连接"""
+        # 先打印模型配置，再显示输入提示，线程中创建模型时不再打印
+        _print_model_config()
+        mode_input = asyncio.create_task(
+            aio_input("选择模式 (1: 快速测试, 2: 交互对话): "),
+        )
+        try:
+            model, formatter = await asyncio.to_thread(
+                create_custom_model,
+                print_config=False,
+            )
+        except Exception as e:
+            print(f"❌ 初始化失败: {str(e)}")
+            return
+
+        # 模型在当前事件循环中创建的连接池随模型一起关闭
+        try:
+            # 用户输入期间事件循环空闲，此时完成到模型服务的 DNS 解析和
+            # TCP/TLS 握手，之后的正式请求直接复用已建立的连接
+            warmup = asyncio.create_task(model.warmup())
+            mode = await mode_input
+            await warmup
+
+            if mode.strip() == "1":
+                result = await test_custom_model(model, formatter)
+                if result:
+                    print("\n🎉 自定义模型配置成功！")
+                else:
+                    print("\n💡 请根据上面的提示检查配置。")
+            else:
+                await interactive_chat(model, formatter)
+        finally:
+            await model.close()
+
+    run(bootstrap())
\ No newline at end of file
@@ -4,7 +4,10 @@ import os
 from unittest.async_case import IsolatedAsyncioTestCase
 from unittest.mock import patch, MagicMock
 
-from agentscope.formatter import OpenAIChatFormatter
+from agentscope.formatter import (
+    IncrementalOpenAIChatFormatter,
+    OpenAIChatFormatter,
+)
 from agentscope.formatter._openai_formatter import OpenAIMultiAgentFormatter
 from agentscope.message import (
     Msg,
@@ -478,6 +481,43 @@ class TestOpenAIFormatter(IsolatedAsyncioTestCase):
             self.ground_truth_multiagent_without_conversation[1:],
         )
 
+    @patch("agentscope.formatter._formatter_base._save_base64_data")
+    async def test_incremental_formatter(
+        self,
+        mock_save_base64_data: MagicMock,
+    ) -> None:
+        """Test the incremental OpenAI chat formatter."""
+        mock_save_base64_data.return_value = self.mock_audio_path
+
+        formatter = IncrementalOpenAIChatFormatter()
+
+        # Conversation only
+        res = await formatter.format(
+            [*self.msgs_system, *self.msgs_conversation],
+        )
+        self.assertListEqual(
+            res,
+            self.ground_truth_chat[: -len(self.msgs_tools)],
+        )
+
+        # Only the newly added tools messages are formatted
+        with patch.object(
+            formatter,
+            "_format",
+            wraps=formatter._format,
+        ) as mock_format:
+            res = await formatter.format(
+                [*self.msgs_system, *self.msgs_conversation, *self.msgs_tools],
+            )
+        self.assertListEqual(res, self.ground_truth_chat)
+        self.assertEqual(mock_format.call_count, len(self.msgs_tools))
+
+        # Removed messages are dropped from the output
+        res = await formatter.format(
+            [*self.msgs_conversation, *self.msgs_tools],
+        )
+        self.assertListEqual(res, self.ground_truth_chat[1:])
+
     async def asyncTearDown(self) -> None:
         """Clean up the test environment."""
         if os.path.exists(self.image_path):